@@ -265,6 +265,43 @@ CELERY_BEAT_SCHEDULE = {
         "task": "users.tasks.send_weekly_updates",
         "schedule": crontab(hour=3, minute=1, day_of_week=5),
     },
+    # Fix counter columns that drifted from their relations, every night
+    "reconcile-likes-count": {
+        "task": "business.tasks.reconcile_likes_count",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "reconcile-replies-count": {
+        "task": "spots.tasks.reconcile_replies_count",
+        "schedule": crontab(hour=4, minute=10),
+    },
+    "reconcile-participants-count": {
+        "task": "moments.tasks.reconcile_participants_count",
+        "schedule": crontab(hour=4, minute=20),
+    },
+    # Save the insights buffered by the views
+    "flush-insights": {
+        "task": "insights.tasks.flush_insights",
+        "schedule": 10.0,
+    },
+    # Delete the moments, events and spots that expired
+    "delete-expired-moments": {
+        "task": "moments.tasks.delete_expired_moments",
+        "schedule": 60.0,
+    },
+    "delete-expired-spots": {
+        "task": "spots.tasks.delete_expired_spots",
+        "schedule": 60.0,
+    },
+    # Schedule the occurrences of the periodic events for the coming weeks
+    "roll-event-occurrences": {
+        "task": "moments.tasks.roll_event_occurrences",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    # Rebuild the likes leaderboards from the reconciled counters
+    "rebuild-leaderboards": {
+        "task": "business.tasks.rebuild_leaderboards",
+        "schedule": crontab(hour=4, minute=30),
+    },
 }
 
 # EMAIL
@@ -0,0 +1,88 @@
+import time
+from math import floor
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+
+from services.date import get_minute_of_week
+
+# Degrees, about 500 m: users in the same cell share the nearby venues result
+NEARBY_CELL_SIZE = 0.005
+
+# Degrees, wider than the search radius: changes to a venue invalidate the regions around it
+NEARBY_REGION_SIZE = 0.2
+
+NEARBY_TIME_BUCKET = 15
+
+NEARBY_CACHE_TIMEOUT = 15 * 60
+
+# Sort tuples kept per cell, deeper pages are read from the database
+NEARBY_CACHE_SIZE = 120
+
+
+def get_cell(coordinate, size):
+    return floor(coordinate.x / size), floor(coordinate.y / size)
+
+
+def get_cell_center(cell):
+    x, y = cell
+    return Point((x + 0.5) * NEARBY_CELL_SIZE, (y + 0.5) * NEARBY_CELL_SIZE, srid=4326)
+
+
+def get_region_version_key(region):
+    return f"nearby:region:{region[0]}:{region[1]}"
+
+
+def join_ids(ids):
+    return ",".join(str(id) for id in sorted(ids or []))
+
+
+def get_nearby_cache_key(data, cell):
+    region = get_cell(get_cell_center(cell), NEARBY_REGION_SIZE)
+    version = cache.get(get_region_version_key(region), 0)
+
+    bucket = get_minute_of_week(data.get("date")) // NEARBY_TIME_BUCKET
+
+    params = [
+        data.get("type"),
+        join_ids(data.get("categories")),
+        join_ids(data.get("amenities")),
+        data.get("price_target"),
+        int(bool(data.get("closed_too"))),
+    ]
+
+    params = ":".join(str(param) for param in params)
+
+    return f"nearby:{cell[0]}:{cell[1]}:{version}:{bucket}:{params}"
+
+
+def get_nearby_entries(key):
+    return cache.get(key)
+
+
+def cache_nearby_entries(key, entries):
+    cache.set(key, entries, timeout=NEARBY_CACHE_TIMEOUT)
+
+
+"""
+    Bumps the version of the regions around the coordinate, so every cached cell
+    that could contain a venue there is skipped from now on.
+"""
+
+
+def invalidate_nearby_cache(*coordinates):
+    version = time.time_ns()
+    versions = {}
+
+    for coordinate in coordinates:
+        if coordinate is None:
+            continue
+
+        x, y = get_cell(coordinate, NEARBY_REGION_SIZE)
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                versions[get_region_version_key((x + dx, y + dy))] = version
+
+    if versions:
+        cache.set_many(versions, timeout=None)
@@ -1,31 +1,55 @@
 from django.contrib.gis.db.models.functions import Distance as GeoDistance
 from django.contrib.gis.measure import Distance as MeasureDistance
-from django.db.models import Count
-from django.db.models import Exists, OuterRef
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.db.models.query_utils import Q
 
+from business.caches import (
+    NEARBY_CACHE_SIZE,
+    NEARBY_CELL_SIZE,
+    cache_nearby_entries,
+    get_cell,
+    get_cell_center,
+    get_nearby_cache_key,
+    get_nearby_entries,
+)
 from business.categories import VenueCategories, VenueTypes
+from business.leaderboards import get_leaderboard
 from business.models import Business
 from business.query_expressions import (
-    get_timetable_params,
-    get_tonight_timetable_params,
+    get_open_now_expression,
+    get_open_tonight_expression,
 )
 from core.constants import SEARCH_RADIUS_NOT_IN_CITY
+from core.pagination import encode_value, paginate, paginate_entries, parse_ordering
 from core.querylimits import QueryLimits
-from services.date import (
-    get_date_for_search,
-    get_yesterday_and_today,
-    get_midnight_for_search,
-)
+from insights.models import BusinessRepost
+from moments.models import EventMoment
+from posts.models import BusinessPost
+from services.date import get_this_week_range
 from spots.models import Spot
 
 
-def get_businesses_nearby(data):
+# Exists instead of joins, so businesses matching many features aren't duplicated
+def has_categories(**lookups):
+    categories = Business.categories.through.objects.filter(
+        business=OuterRef("pk"), **lookups
+    )
+    return Exists(categories)
+
+
+def has_amenities(**lookups):
+    amenities = Business.amenities.through.objects.filter(
+        business=OuterRef("pk"), **lookups
+    )
+    return Exists(amenities)
+
+
+# Returns the filtered venues with their distance from the position and the sort tuple
+def get_nearby_queryset(data, position):
     date = data.get("date")
-    user_date = get_date_for_search(date)
 
     place_id = data.get("place_id", None)
-    user_position = data.get("coordinate")
 
     experience_type = data.get("type")
 
@@ -35,32 +59,28 @@ def get_businesses_nearby(data):
 
     closed_too = data.get("closed_too")
 
-    offset = data.get("offset")
-    up_offset = offset + QueryLimits.BUSINESS_LIST
-
     is_city = place_id is not None
 
     queryset = Business.objects.only_approved().filter(timetable__isnull=False)
 
     if is_city:
-        queryset = queryset.filter(location__place_id=place_id)
+        queryset = queryset.filter(place_id=place_id)
     else:
         queryset = queryset.filter(
-            location__coordinate__distance_lte=(
-                user_position,
+            coordinate__distance_lte=(
+                position,
                 MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
             )
         )
 
     queryset = queryset.annotate(
-        distance=GeoDistance("location__coordinate", user_position),
-        likes_count=Count("likes"),
+        distance=GeoDistance("coordinate", position)
     )
 
     if len(categories) > 0 or len(amenities) > 0:
         queryset = queryset.filter(
-            Q(categories__id__in=categories)
-            | Q(amenities__id__in=amenities)
+            has_categories(businesscategory__id__in=categories)
+            | has_amenities(amenity__id__in=amenities)
             | Q(category__id__in=categories)
         )
 
@@ -92,202 +112,170 @@ def get_businesses_nearby(data):
 
     if len(categories) > 0:
         queryset = queryset.filter(
-            Q(categories__en__in=categories) | Q(category__en__in=categories)
+            has_categories(businesscategory__en__in=categories)
+            | Q(category__en__in=categories)
         )
 
     if closed_too:
-        queryset = queryset.order_by(*order_by_params)
-        return queryset[offset:up_offset]
+        return queryset, order_by_params
 
-    # Start time selection
+    # If tonight is selected then filter all businesses open at the tonight threshold
 
-    [yesterday, today] = get_yesterday_and_today(date, offset_midnight=True)
+    if is_tonight:
+        queryset = queryset.filter(get_open_tonight_expression(date))
+    else:
+        queryset = queryset.filter(get_open_now_expression(date))
 
-    business_open_yesterday_query = {f"timetable__{yesterday}__len__gte": 2}
-    business_open_today_query = {f"timetable__{today}__len__gte": 2}
+    return queryset, order_by_params
 
-    # If tonight is selected then we need to filter all businesses open after 20:00
 
-    if is_tonight:
-        [first_from, first_to, second_from, second_to] = get_tonight_timetable_params(
-            today
-        )
-
-        queryset = queryset.filter(
-            Q(Q(**first_from) & Q(**first_to)) | Q(Q(**second_from) & Q(**second_to))
-        ).order_by(*order_by_params)
+def get_businesses_nearby(data):
+    place_id = data.get("place_id", None)
+    user_position = data.get("coordinate")
 
-        return queryset[offset:up_offset]
+    page_params = {
+        "limit": QueryLimits.BUSINESS_LIST,
+        "cursor": data.get("cursor"),
+        "offset": data.get("offset"),
+    }
 
-    next_day_midnight = get_midnight_for_search()
+    if place_id is not None:
+        queryset, order_by_params = get_nearby_queryset(data, user_position)
+        return paginate(queryset, order_by_params, **page_params)
 
-    # All businesses that are open yesterday
+    return get_cached_businesses_nearby(data, user_position, page_params)
 
-    yesterday_queryset = queryset.filter(**business_open_yesterday_query)
 
-    # All businesses that are open today
+"""
+    Users in the same cell share the venues sorted from the cell center, cached
+    as sort tuples. Only the venues of the served page are loaded, with their
+    exact distance from the user.
+"""
 
-    today_queryset = queryset.filter(**business_open_today_query)
 
-    # All businesses that are open at the time of the request
+def get_cached_businesses_nearby(data, user_position, page_params):
+    cell = get_cell(user_position, NEARBY_CELL_SIZE)
 
-    """
-        start_date - user_date > 0
-        end_date - user_date > 0
-        
-        If both are verified, add one day to user_date
-    """
+    queryset, order_by_params = get_nearby_queryset(data, get_cell_center(cell))
+    fields = [field for field, _ in parse_ordering(order_by_params)]
 
-    deltas, timetable_query, query_conditions = get_timetable_params(
-        today, yesterday, user_date
-    )
+    key = get_nearby_cache_key(data, cell)
+    entries = get_nearby_entries(key)
 
-    [
-        yesterday_first_sc_delta,
-        yesterday_first_ec_delta,
-        yesterday_second_sc_delta,
-        yesterday_second_ec_delta,
-        today_first_sc_delta,
-        today_first_ec_delta,
-        today_second_sc_delta,
-        today_second_ec_delta,
-    ] = deltas
-
-    [
-        yesterday_first_from,
-        yesterday_first_to,
-        yesterday_second_from,
-        yesterday_second_to,
-        today_first_from,
-        today_first_to,
-        today_second_from,
-        today_second_to,
-    ] = timetable_query
-
-    [
-        yesterday_first_query_condition,
-        yesterday_second_query_condition,
-        today_first_query_condition,
-        today_second_query_condition,
-    ] = query_conditions
-
-    yesterday_first_queryset = (
-        yesterday_queryset.filter()
-        .annotate(
-            yesterday_first_sc_delta=yesterday_first_sc_delta,
-            yesterday_first_ec_delta=yesterday_first_ec_delta,
-        )
-        .annotate(**yesterday_first_query_condition)
-        .filter(user_date__gte=next_day_midnight)
-        .filter(Q(**yesterday_first_from) & Q(**yesterday_first_to))
-    )
+    if entries is None:
+        rows = queryset.order_by(*order_by_params).values_list(*fields)
+        entries = [
+            [encode_value(value) for value in row]
+            for row in rows[:NEARBY_CACHE_SIZE]
+        ]
+        cache_nearby_entries(key, entries)
 
-    today_first_queryset = (
-        today_queryset.filter()
-        .annotate(
-            today_first_sc_delta=today_first_sc_delta,
-            today_first_ec_delta=today_first_ec_delta,
-        )
-        .annotate(**today_first_query_condition)
-        .filter(Q(**today_first_from) & Q(**today_first_to))
-    )
+    page = paginate_entries(entries, order_by_params, **page_params)
+    ids = [entry[fields.index("id")] for entry in page.items]
 
-    timetable_len_check_yesterday = {f"timetable__{yesterday}__len__gt": 2}
-    timetable_len_check_today = {f"timetable__{today}__len__gt": 2}
+    # Past the cached entries the page is read from the database
+    if page.next_cursor is None and len(entries) == NEARBY_CACHE_SIZE:
+        page = paginate(queryset, order_by_params, **page_params)
+        ids = [business.id for business in page.items]
 
-    yesterday_second_queryset = (
-        yesterday_queryset.filter(**timetable_len_check_yesterday)
-        .annotate(
-            yesterday_second_sc_delta=yesterday_second_sc_delta,
-            yesterday_second_ec_delta=yesterday_second_ec_delta,
-        )
-        .annotate(**yesterday_second_query_condition)
-        .filter(user_date__gte=next_day_midnight)
-        .filter(Q(**yesterday_second_from) & Q(**yesterday_second_to))
+    businesses = (
+        Business.objects.filter(id__in=ids)
+        .select_related("location", "timetable")
+        .annotate(distance=GeoDistance("coordinate", user_position))
     )
+    businesses = {business.id: business for business in businesses}
 
-    today_second_queryset = (
-        today_queryset.filter(**timetable_len_check_today)
-        .annotate(
-            today_second_sc_delta=today_second_sc_delta,
-            today_second_ec_delta=today_second_ec_delta,
-        )
-        .annotate(**today_second_query_condition)
-        .filter(Q(**today_second_from) & Q(**today_second_to))
-    )
+    page.items = [businesses[id] for id in ids if id in businesses]
 
-    first_queryset = yesterday_first_queryset | today_first_queryset
+    return page
 
-    second_queryset = today_second_queryset | yesterday_second_queryset
 
-    queryset = first_queryset | second_queryset
+"""
+    Loads everything BusinessSerializer renders with a fixed number of queries,
+    no matter how many venues are in the queryset.
+"""
 
-    queryset = queryset.order_by(*order_by_params)
 
-    return queryset[offset:up_offset]
+def get_businesses_with_details(queryset, user):
+    from_date, to_date = get_this_week_range()
 
+    week_reposts = (
+        BusinessRepost.objects.filter(
+            business=OuterRef("pk"),
+            created_at__gte=from_date,
+            created_at__lte=to_date,
+        )
+        .order_by()
+        .values("business")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
 
-def get_business_rank_value(business):
-    location = business.location
-    category = business.category
+    events = EventMoment.objects.order_by("date", "time")
 
-    if category is None:
-        return None
+    return (
+        queryset.select_related("location", "timetable", "category")
+        .prefetch_related(
+            "categories",
+            "amenities",
+            Prefetch("businesshighlight_set", to_attr="prefetched_highlights"),
+            Prefetch("business_moment", queryset=events, to_attr="prefetched_events"),
+        )
+        .annotate(
+            is_liked=Exists(
+                Business.likes.through.objects.filter(
+                    business=OuterRef("pk"), userprofile__user=user
+                )
+            ),
+            has_any_post=Exists(BusinessPost.objects.filter(business=OuterRef("pk"))),
+            week_reposts_count=Coalesce(Subquery(week_reposts), 0),
+        )
+    )
 
-    queryset = Business.objects.get_business_rank(location.place_id, category.id)
 
-    index = 0
-    rank_value = None
+# Top venues of a city category, in leaderboard order
+def get_top_businesses(place_id, category, user):
+    ids = get_leaderboard(place_id, category)
 
-    for query in list(queryset):
-        if query.id == business.id:
-            rank_value = index
-        index += 1
+    queryset = get_businesses_with_details(Business.objects.filter(id__in=ids), user)
+    businesses = {business.id: business for business in queryset}
 
-        if index == 10:
-            break
+    businesses = [businesses[id] for id in ids if id in businesses]
 
-    if rank_value is not None:
-        return rank_value + 1
+    for position, business in enumerate(businesses, start=1):
+        business.ranking_position = position
 
-    return None
+    return businesses
 
 
 # Used when the searching value is empty
-def get_nearest_businesses(user_position, offset):
-    up_offset = offset + QueryLimits.SEARCH_BUSINESS_LIMIT
-
-    return (
+def get_nearest_businesses(user_position, cursor=None, offset=0):
+    queryset = (
         Business.objects.only_approved()
         .filter(
-            location__coordinate__distance_lte=(
+            coordinate__distance_lte=(
                 user_position,
                 MeasureDistance(m=5000),
             ),
         )
-        .annotate(distance=GeoDistance("location__coordinate", user_position))
-        .order_by("distance")[offset:up_offset]
+        .annotate(distance=GeoDistance("coordinate", user_position))
     )
 
-
-def get_overall_business_rank(business):
-    queryset = Business.objects.get_by_place_id(business.location.place_id)
-
-    rank_index = 0
-
-    for index, buss in enumerate(queryset):
-        if buss.id == business.id:
-            rank_index = index + 1
-
-    return rank_index
+    return paginate(
+        queryset,
+        ("distance", "id"),
+        QueryLimits.SEARCH_BUSINESS_LIMIT,
+        cursor=cursor,
+        offset=offset,
+    )
 
 
 def get_businesses_for_spot(data):
     place_id = data.get("place_id", None)
     user_position = data.get("coordinate")
 
+    cursor = data.get("cursor")
     offset = data.get("offset")
-    up_offset = offset + 8
 
     is_city = place_id is not None
 
@@ -300,19 +288,23 @@ def get_businesses_for_spot(data):
     )
 
     if is_city:
-        queryset = queryset.filter(location__place_id=place_id)
+        queryset = queryset.filter(place_id=place_id)
     else:
         queryset = queryset.filter(
-            location__coordinate__distance_lte=(
+            coordinate__distance_lte=(
                 user_position,
                 MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
             )
         )
 
     queryset = queryset.annotate(
-        distance=GeoDistance("location__coordinate", user_position)
+        distance=GeoDistance("coordinate", user_position)
     )
 
-    queryset = queryset.order_by("distance")[offset:up_offset]
-
-    return queryset
+    return paginate(
+        queryset,
+        ("distance", "id"),
+        QueryLimits.BUSINESS_SPOT_LIMIT,
+        cursor=cursor,
+        offset=offset,
+    )
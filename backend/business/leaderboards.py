@@ -0,0 +1,204 @@
+from collections import defaultdict
+
+from business.models import Business
+from core.querylimits import QueryLimits
+from services.redis import get_redis
+
+"""
+    Venues are ranked by likes in redis sorted sets, one per city and one per
+    city and category. Scores are the negated likes so ranks are read ascending,
+    and members are zero padded ids so ties keep the oldest venue first.
+"""
+
+LEADERBOARD_PREFIX = "leaderboard"
+
+# Keys each venue is ranked in, to move it when its city or category changes
+LEADERBOARD_MEMBERS_KEY = f"{LEADERBOARD_PREFIX}:members"
+
+# Cities that have been built, as a city without venues has no leaderboard key
+LEADERBOARD_BUILT_KEY = f"{LEADERBOARD_PREFIX}:built"
+
+
+def get_leaderboard_key(place_id, category=None):
+    if category is None:
+        return f"{LEADERBOARD_PREFIX}:{place_id}"
+
+    return f"{LEADERBOARD_PREFIX}:{place_id}:{category}"
+
+
+def get_leaderboard_keys(place_id, category):
+    if not place_id:
+        return []
+
+    keys = [get_leaderboard_key(place_id)]
+
+    if category is not None:
+        keys.append(get_leaderboard_key(place_id, category))
+
+    return keys
+
+
+def encode_member(id):
+    return f"{id:012d}"
+
+
+def decode_member(member):
+    return int(member)
+
+
+def get_leaderboard_rows(queryset):
+    return queryset.filter(is_approved=True).values_list(
+        "id", "likes_count", "place_id", "category_id"
+    )
+
+
+def update_leaderboards(ids):
+    ids = list(ids)
+
+    if not ids:
+        return
+
+    client = get_redis()
+    rows = get_leaderboard_rows(Business.objects.filter(id__in=ids))
+    rows = {row[0]: row for row in rows}
+
+    previous_keys = client.hmget(LEADERBOARD_MEMBERS_KEY, ids)
+
+    pipeline = client.pipeline()
+
+    for id, previous in zip(ids, previous_keys):
+        member = encode_member(id)
+
+        keys = []
+
+        if id in rows:
+            _, likes_count, place_id, category = rows[id]
+            keys = get_leaderboard_keys(place_id, category)
+
+        for key in (previous or "").split(","):
+            if key and key not in keys:
+                pipeline.zrem(key, member)
+
+        for key in keys:
+            pipeline.zadd(key, {member: -likes_count})
+
+        if keys:
+            pipeline.hset(LEADERBOARD_MEMBERS_KEY, id, ",".join(keys))
+        else:
+            pipeline.hdel(LEADERBOARD_MEMBERS_KEY, id)
+
+    pipeline.execute()
+
+
+"""
+    Rebuilds the leaderboards of a city, or of every city, from the likes
+    counters. Each key is replaced atomically, readers never see it empty.
+"""
+
+
+def rebuild_leaderboards(place_id=None):
+    client = get_redis()
+
+    queryset = Business.objects.all()
+
+    if place_id is not None:
+        queryset = queryset.filter(place_id=place_id)
+        patterns = [get_leaderboard_key(place_id), f"{get_leaderboard_key(place_id)}:*"]
+    else:
+        patterns = [f"{LEADERBOARD_PREFIX}:*"]
+
+    leaderboards = defaultdict(dict)
+    members = {}
+    place_ids = {place_id} if place_id is not None else set()
+
+    for id, likes_count, business_place_id, category in get_leaderboard_rows(queryset):
+        keys = get_leaderboard_keys(business_place_id, category)
+
+        for key in keys:
+            leaderboards[key][encode_member(id)] = -likes_count
+
+        if keys:
+            members[id] = ",".join(keys)
+            place_ids.add(business_place_id)
+
+    stale_keys = set()
+
+    for pattern in patterns:
+        stale_keys.update(client.scan_iter(match=pattern))
+
+    stale_keys.discard(LEADERBOARD_MEMBERS_KEY)
+    stale_keys.discard(LEADERBOARD_BUILT_KEY)
+
+    pipeline = client.pipeline()
+
+    for key in stale_keys - set(leaderboards):
+        pipeline.delete(key)
+
+    for key, entries in leaderboards.items():
+        pipeline.delete(key)
+        pipeline.zadd(key, entries)
+
+    if members:
+        pipeline.hset(LEADERBOARD_MEMBERS_KEY, mapping=members)
+
+    if place_ids:
+        pipeline.sadd(LEADERBOARD_BUILT_KEY, *place_ids)
+
+    pipeline.execute()
+
+    return len(members)
+
+
+def remove_from_leaderboards(id):
+    client = get_redis()
+
+    keys = client.hget(LEADERBOARD_MEMBERS_KEY, id)
+    member = encode_member(id)
+
+    pipeline = client.pipeline()
+
+    for key in (keys or "").split(","):
+        if key:
+            pipeline.zrem(key, member)
+
+    pipeline.hdel(LEADERBOARD_MEMBERS_KEY, id)
+    pipeline.execute()
+
+
+# Cities missing from redis, e.g. after a flush, are rebuilt on first read
+def ensure_leaderboards(client, place_id):
+    if not client.sismember(LEADERBOARD_BUILT_KEY, place_id):
+        rebuild_leaderboards(place_id)
+
+
+# Ids of the top venues of a city, or of a category of it
+def get_leaderboard(place_id, category=None, count=QueryLimits.BUSINESS_RANKING):
+    if not place_id:
+        return []
+
+    client = get_redis()
+    ensure_leaderboards(client, place_id)
+
+    members = client.zrange(get_leaderboard_key(place_id, category), 0, count - 1)
+
+    return [decode_member(member) for member in members]
+
+
+# Position of the venue in the ranking of its city and main category, from 1
+def get_leaderboard_position(business):
+    if not business.is_approved or business.category_id is None:
+        return None
+
+    # The place_id copied from the location, see shared.locations
+    place_id = business.place_id
+
+    if not place_id:
+        return None
+
+    client = get_redis()
+    ensure_leaderboards(client, place_id)
+
+    key = get_leaderboard_key(place_id, business.category_id)
+    rank = client.zrank(key, encode_member(business.id))
+
+    return None if rank is None else rank + 1
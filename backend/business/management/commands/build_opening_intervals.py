@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from business.models import BusinessTimetable
+
+
+class Command(BaseCommand):
+    help = "Rebuild the opening intervals of every business timetable"
+
+    def handle(self, *args, **options):
+        count = 0
+
+        for timetable in BusinessTimetable.objects.iterator(chunk_size=500):
+            with transaction.atomic():
+                timetable.update_intervals()
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt intervals of {count} timetables")
+        )
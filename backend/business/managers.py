@@ -1,5 +1,4 @@
 from django.db import models
-from django.db.models import Count
 
 
 class BusinessManager(models.Manager):
@@ -13,13 +12,4 @@ class BusinessManager(models.Manager):
             return None
 
     def get_by_place_id(self, place_id):
-        return self.only_approved().filter(location__place_id=place_id)
-
-    def get_business_rank(self, place_id, category):
-        return (
-            self.only_approved()
-                .filter(location__place_id=place_id, category__id=category)
-                .distinct()
-                .annotate(likes_count=Count("likes"))
-                .order_by("-likes_count", "id")[:10]
-        )
+        return self.only_approved().filter(place_id=place_id)
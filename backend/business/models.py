@@ -1,15 +1,22 @@
 import binascii
 import os
 
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.gis.db import models as geomodels
+from django.contrib.postgres.fields import ArrayField, IntegerRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex, OpClass
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.db.models.query_utils import Q
+from psycopg2.extras import NumericRange
 from core.fields import UniqueNameFileField
 
 from business.managers import BusinessManager
 from core.fields import ShortUUIDField
 from core.models import TimestampModel
 from phonenumber_field.modelfields import PhoneNumberField
+from services.date import MINUTES_IN_DAY, MINUTES_IN_WEEK, WEEK_DAYS
+from services.search import get_search_vector
 
 allow_blank = {"blank": True, "null": True}
 
@@ -56,6 +63,10 @@ class Business(TimestampModel):
         **allow_blank,
     )
 
+    # Copied from the location by shared.locations, for single table geo queries
+    coordinate = geomodels.PointField(editable=False, **allow_blank)
+    place_id = models.CharField(max_length=256, blank=True, default="", editable=False)
+
     phone = PhoneNumberField(default=None, **allow_blank, validators=[])
 
     timetable = models.OneToOneField(
@@ -81,6 +92,7 @@ class Business(TimestampModel):
     cover_source = UniqueNameFileField(blank=False, upload_to=business_source_path)
 
     likes = models.ManyToManyField("profiles.UserProfile", blank=True)
+    likes_count = models.IntegerField(default=0, editable=False)
 
     delivery_options = ArrayField(models.CharField(max_length=255), **allow_blank)
 
@@ -92,12 +104,10 @@ class Business(TimestampModel):
     objects = BusinessManager()
 
     def add_repost(self):
-        self.reposts_count += 1
-        self.save()
+        Business.objects.filter(id=self.id).update(reposts_count=F("reposts_count") + 1)
 
     def sub_repost(self):
-        self.reposts_count -= 1
-        self.save()
+        Business.objects.filter(id=self.id).update(reposts_count=F("reposts_count") - 1)
 
     class Meta:
         indexes = [
@@ -111,6 +121,22 @@ class Business(TimestampModel):
                 condition=Q(is_approved=True),
                 name="%(app_label)s_location_part_ix",
             ),
+            models.Index(
+                F("likes_count").desc(),
+                "id",
+                condition=Q(is_approved=True),
+                name="%(app_label)s_likes_part_ix",
+            ),
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="%(app_label)s_name_trgm_ix",
+            ),
+            GinIndex(get_search_vector("name"), name="%(app_label)s_name_search_ix"),
+            models.Index(
+                fields=["place_id"],
+                condition=~Q(place_id=""),
+                name="%(app_label)s_%(class)s_place_ix",
+            ),
         ]
 
     # METHODS
@@ -148,7 +174,59 @@ class BusinessTimetable(models.Model):
     def update(self, timetable):
         for key, value in timetable.items():
             setattr(self, key, value)
-            self.save()
+        self.save()
+
+    """
+        Every [open, close] pair of a day becomes a range of minutes of the week
+        (monday 00:00 is 0). Closing times past midnight fall into the next day
+        and sunday night intervals wrap around to monday.
+    """
+
+    def get_intervals(self):
+        intervals = []
+
+        for day_index, day in enumerate(WEEK_DAYS):
+            hours = getattr(self, day) or []
+
+            for open_date, close_date in zip(hours[0::2], hours[1::2]):
+                open_minute = open_date.hour * 60 + open_date.minute
+                close_minute = close_date.hour * 60 + close_date.minute
+
+                duration = (close_minute - open_minute) % MINUTES_IN_DAY
+                duration = duration or MINUTES_IN_DAY
+
+                start = day_index * MINUTES_IN_DAY + open_minute
+                end = start + duration
+
+                if end > MINUTES_IN_WEEK:
+                    intervals.append((start, MINUTES_IN_WEEK - 1))
+                    intervals.append((0, end - MINUTES_IN_WEEK))
+                else:
+                    intervals.append((start, end))
+
+        return intervals
+
+    def update_intervals(self):
+        self.intervals.all().delete()
+
+        BusinessOpeningInterval.objects.bulk_create(
+            [
+                BusinessOpeningInterval(
+                    timetable=self, minutes=NumericRange(start, end, bounds="[]")
+                )
+                for start, end in self.get_intervals()
+            ]
+        )
+
+
+class BusinessOpeningInterval(models.Model):
+    timetable = models.ForeignKey(
+        "BusinessTimetable", on_delete=models.CASCADE, related_name="intervals"
+    )
+    minutes = IntegerRangeField()
+
+    class Meta:
+        indexes = [GistIndex(fields=["minutes"], name="%(app_label)s_interval_ix")]
 
 
 class BusinessHighlight(models.Model):
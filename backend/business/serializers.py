@@ -1,21 +1,18 @@
-from business.functions import get_business_rank_value
+from business.leaderboards import get_leaderboard_position
 from business.models import (
     Business,
     BusinessToken,
     BusinessTimetable,
     BusinessHighlight,
 )
-from insights.models import BusinessLike
-from insights.models import BusinessRepost
-from moments.models import EventMoment
-from posts.models import BusinessPost
+from core.querylimits import QueryLimits
 from profiles.models import BusinessProfile
 from profiles.models import UserProfile
 from rest_framework import serializers
 from services.date import get_yesterday_and_today
 from services.images import crop_image_white_line
 from services.utils import update_for_object, pop_or_none
-from shared.models import Location
+from shared.models import LOCATION_FIELDS, Location
 from shared.serializers import (
     CreateLocationSerializer,
     LocationSerializer,
@@ -37,7 +34,7 @@ class CreateBusinessSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Business
-        exclude = ("owner", "cover_source", "is_approved")
+        exclude = ("owner", "cover_source", "is_approved", *LOCATION_FIELDS)
 
     def validate_location(self, location):
         return Location.objects.create(**location)
@@ -84,7 +81,7 @@ class UpdateBusinessSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Business
-        exclude = ("owner", "cover_source", "is_approved")
+        exclude = ("owner", "cover_source", "is_approved", *LOCATION_FIELDS)
 
     def update(self, business, validated_data):
         location = pop_or_none("location", validated_data)
@@ -117,21 +114,6 @@ class UpdateBusinessSerializer(serializers.ModelSerializer):
         return business
 
 
-class BusinessMeSerializer(serializers.Serializer):
-    liked = serializers.SerializerMethodField()
-
-    def __init__(self, instance, **kwargs):
-        super().__init__(instance, **kwargs)
-
-        request = self.context.get("req")
-        self.request_data = request.data
-        self.user = request.user
-
-    def get_liked(self, business):
-        likes = BusinessLike.objects.filter(business=business, user=self.user)
-        return likes.exists()
-
-
 SHORT_BUSINESS_SERIALIZER_FIELDS = ("id", "name", "cover_source", "city")
 
 
@@ -213,9 +195,17 @@ class BusinessRankingSerializer(serializers.Serializer):
     ranking = serializers.SerializerMethodField()
 
     def get_ranking(self, business):
-        return get_business_rank_value(business)
+        ranking = getattr(business, "ranking_position", None)
+
+        if ranking is None:
+            ranking = get_leaderboard_position(business)
+
+        if ranking is not None and ranking <= QueryLimits.BUSINESS_RANKING:
+            return ranking
+        return None
 
 
+# Render querysets from get_businesses_with_details, which loads every field in bulk
 class BusinessSerializer(
     serializers.ModelSerializer,
     CategoriesBusinessSerializer,
@@ -252,26 +242,26 @@ class BusinessSerializer(
             "created_at",
             "updated_at",
             "extra_data",
+            *LOCATION_FIELDS,
         )
 
     def get_id(self, business):
         return business.uuid
 
     def get_likes(self, business):
-        return business.likes.count()
+        return business.likes_count
 
     def get_me(self, business):
-        return BusinessMeSerializer(business, context=self.context).data
+        return {"liked": business.is_liked}
 
     def get_has_posts(self, business):
-        count = BusinessPost.objects.filter(business=business).count()
-        return count > 0
+        return business.has_any_post
 
     def get_reposts_count(self, business):
-        return BusinessRepost.objects.get_this_week_count(business)
+        return business.week_reposts_count
 
     def get_highlights(self, business):
-        highlights = BusinessHighlight.objects.filter(business=business)
+        highlights = business.prefetched_highlights
         highlights = BusinessHighlightSerializer(highlights, many=True)
 
         return highlights.data
@@ -279,7 +269,7 @@ class BusinessSerializer(
     def get_events(self, business):
         from moments.serializers import ShortVenueEventPreviewSerializer
 
-        events = EventMoment.objects.filter(business=business).order_by("date", "time")
+        events = business.prefetched_events
 
         events = ShortVenueEventPreviewSerializer(events, many=True)
         return events.data
@@ -295,7 +285,7 @@ class EditBusinessSerializer(
 
     class Meta:
         model = Business
-        exclude = ("owner", "extra_data", "likes")
+        exclude = ("owner", "extra_data", "likes", *LOCATION_FIELDS)
 
 
 class MyBusinessSerializer(EditBusinessSerializer, BusinessRankingSerializer):
@@ -315,7 +305,8 @@ class MyBusinessSerializer(EditBusinessSerializer, BusinessRankingSerializer):
 class ShortBusinessGETParamsSerializer(serializers.Serializer):
     coordinate = CreateCoordinateSerializer()
     place_id = serializers.CharField(required=False)
-    offset = serializers.IntegerField()
+    offset = serializers.IntegerField(required=False, default=0)
+    cursor = serializers.CharField(required=False)
 
 
 class BusinessGETParamsSerializer(ShortBusinessGETParamsSerializer):
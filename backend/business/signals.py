@@ -2,12 +2,28 @@ import os
 import shutil
 
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
 
-from business.models import Business, BusinessToken
+from fieldsignals import post_save_changed
+
+from business.caches import invalidate_nearby_cache
+from business.leaderboards import remove_from_leaderboards, update_leaderboards
+from business.models import Business, BusinessTimetable, BusinessToken
 from devices.models import Device
 from devices.utils import NotificationType
+from services.counters import connect_counter
+from shared.models import Location
+
+
+# Leaderboards are updated once the likes are committed
+def on_likes_count_refreshed(ids):
+    ids = list(ids)
+    transaction.on_commit(lambda: update_leaderboards(ids))
+
+
+connect_counter(Business, "likes", "likes_count", on_refresh=on_likes_count_refreshed)
 
 
 @receiver(post_save, sender=Business)
@@ -51,3 +67,67 @@ def on_business_deleted(instance, **_):
 
     if business.timetable is not None:
         business.timetable.delete()
+
+
+@receiver(post_save, sender=BusinessTimetable)
+def on_timetable_saved(instance, **_):
+    instance.update_intervals()
+
+
+"""
+    Invalidate the cached nearby venues around a venue whenever it,
+    its timetable or its position changes.
+"""
+
+
+def invalidate_business_location(location_id):
+    coordinates = Location.objects.filter(id=location_id).values_list(
+        "coordinate", flat=True
+    )
+    invalidate_nearby_cache(*coordinates)
+
+
+# Before deletion, since deleting a venue deletes its location too
+@receiver([post_save, pre_delete], sender=Business)
+def on_business_saved_or_deleted(instance, **_):
+    if instance.location_id is not None:
+        invalidate_business_location(instance.location_id)
+
+
+@receiver([post_save, post_delete], sender=BusinessTimetable)
+def on_timetable_saved_or_deleted(instance, **_):
+    locations = Business.objects.filter(timetable_id=instance.id).values_list(
+        "location_id", flat=True
+    )
+
+    for location_id in locations:
+        invalidate_business_location(location_id)
+
+
+# Deleting a venue location deletes the venue too, which invalidates on its own
+@receiver(post_save_changed, sender=Location, fields=["coordinate"])
+def on_location_moved(instance, changed_fields, **_):
+    if Business.objects.filter(location=instance).exists():
+        previous, current = changed_fields["coordinate"]
+        invalidate_nearby_cache(previous, current)
+
+
+# Approval, category and location changes move the venue between leaderboards
+@receiver(post_save, sender=Business)
+def on_business_ranking_changed(instance, **_):
+    id = instance.id
+    transaction.on_commit(lambda: update_leaderboards([id]))
+
+
+@receiver(post_delete, sender=Business)
+def on_business_ranking_deleted(instance, **_):
+    id = instance.id
+    transaction.on_commit(lambda: remove_from_leaderboards(id))
+
+
+@receiver(post_save_changed, sender=Location, fields=["place_id"])
+def on_location_place_changed(instance, **_):
+    ids = list(Business.objects.filter(location=instance).values_list("id", flat=True))
+
+    if ids:
+        transaction.on_commit(lambda: update_leaderboards(ids))
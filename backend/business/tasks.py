@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from business.leaderboards import rebuild_leaderboards as rebuild_all_leaderboards
+from business.models import Business
+from services.counters import reconcile_counter
+
+
+@shared_task
+def reconcile_likes_count():
+    return reconcile_counter(Business, "likes", "likes_count")
+
+
+@shared_task
+def rebuild_leaderboards():
+    return rebuild_all_leaderboards()
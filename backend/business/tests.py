@@ -0,0 +1,109 @@
+from django.contrib.gis.geos.point import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+
+from business.leaderboards import rebuild_leaderboards
+from business.models import Business, BusinessHighlight, BusinessTimetable
+from moments.models import EventMoment
+from profiles.models import BusinessProfile
+from shared.models import BusinessCategory, Amenity, Location
+from users.models import User
+
+PLACE_ID = "this_is_a_place_id"
+
+RANKED_URL = "/business/ranked/"
+DETAIL_URL = "/business/get/id/"
+
+# Business, prefetched categories, amenities, highlights and events
+DETAIL_QUERIES_COUNT = 5
+
+
+class BusinessSerializerQueriesTests(APITestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+        self.user = User.objects.create(name="Test", username="test")
+        self.client.force_authenticate(user=self.user)
+
+        self.category = BusinessCategory.objects.create(en="Pub", it="Pub")
+        self.amenity = Amenity.objects.create(en="Wifi", it="Wifi")
+
+        # Drops the leaderboards left in redis by previous runs
+        rebuild_leaderboards(PLACE_ID)
+
+    def create_business(self, index):
+        owner_user = User.objects.create(name="Owner", username=f"owner_{index}")
+        owner = BusinessProfile.objects.create(user=owner_user)
+
+        location = Location.objects.create(
+            address="Baker Street 221/B",
+            city="Padova",
+            place_id=PLACE_ID,
+            coordinate=Point([11.865, 45.416], srid=4326),
+        )
+
+        # Leaderboards are updated on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            business = Business.objects.create(
+                owner=owner,
+                name=f"Venue {index}",
+                category=self.category,
+                location=location,
+                timetable=BusinessTimetable.objects.create(),
+                cover_source="cover.png",
+                is_approved=True,
+            )
+
+        business.categories.add(self.category)
+        business.amenities.add(self.amenity)
+
+        BusinessHighlight.objects.create(business=business, title="Hi", content="Hi")
+
+        EventMoment.objects.create(
+            business=business,
+            cover="cover.png",
+            title="Party",
+            periodic_day=4,
+            time="22:00",
+            end_time="02:00",
+        )
+
+        return business
+
+    def count_ranked_queries(self):
+        data = {"place_id": PLACE_ID, "category": self.category.id}
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(RANKED_URL, data)
+
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.data
+
+    def test_ranked_businesses_queries(self):
+        self.create_business(0)
+        one_count, venues = self.count_ranked_queries()
+
+        self.assertEqual(len(venues), 1)
+        self.assertEqual(venues[0]["ranking"], 1)
+
+        for index in range(1, 5):
+            self.create_business(index)
+
+        many_count, venues = self.count_ranked_queries()
+
+        self.assertEqual(len(venues), 5)
+        self.assertEqual(one_count, many_count)
+        self.assertEqual(many_count, DETAIL_QUERIES_COUNT)
+
+    def test_business_detail_queries(self):
+        business = self.create_business(0)
+
+        # The visit is buffered in redis, it doesn't hit the database
+        with self.assertNumQueries(DETAIL_QUERIES_COUNT):
+            response = self.client.post(DETAIL_URL, {"id": business.uuid})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["events"]), 1)
+        self.assertEqual(len(response.data["highlights"]), 1)
+        self.assertFalse(response.data["me"]["liked"])
@@ -3,7 +3,12 @@ import json
 import pydash
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND, HTTP_400_BAD_REQUEST
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+)
 from rest_framework.views import APIView
 
 from authentication.api_views import (
@@ -16,6 +21,8 @@ from business.functions import (
     get_businesses_nearby,
     get_nearest_businesses,
     get_businesses_for_spot,
+    get_businesses_with_details,
+    get_top_businesses,
 )
 from business.models import Business
 from business.serializers import (
@@ -30,15 +37,18 @@ from business.serializers import (
     PreviewBusinessSerializer,
     ShortBusinessGETParamsSerializer,
 )
+from core.pagination import get_page_headers, get_page_params, paginate
 from core.querylimits import QueryLimits
 from devices.models import Device
+from services.relations import toggle_member
+from services.search import search_businesses
 from insights.utils import (
     add_business_profile_visits,
     add_business_like,
     remove_business_like,
 )
-from shared.models import BusinessCategory, Amenity
-from shared.serializers import CreateCoordinateSerializer, StaticFeatureSerializer
+from shared.catalog import get_catalog
+from shared.serializers import CreateCoordinateSerializer
 
 
 def get_business_data(request):
@@ -106,13 +116,15 @@ def get_businesses(request):
 
     if serializer.is_valid():
         data = serializer.validated_data
-        businesses = get_businesses_nearby(data)
+        page = get_businesses_nearby(data)
 
         context = pydash.pick(data, ["date", "closed_too"])
 
-        response = PreviewBusinessSerializer(businesses, many=True, context=context)
+        response = PreviewBusinessSerializer(page.items, many=True, context=context)
 
-        return Response(response.data, status=HTTP_200_OK)
+        return Response(
+            response.data, status=HTTP_200_OK, headers=get_page_headers(page)
+        )
 
     print(serializer.errors)
 
@@ -124,9 +136,11 @@ def get_businesses(request):
 def get_business_by_id(request):
     uuid = (request.data or request.query_params).get("id")
 
-    try:
-        business = Business.objects.get(uuid=uuid)
-    except Business.DoesNotExist:
+    business = get_businesses_with_details(
+        Business.objects.filter(uuid=uuid), request.user
+    ).first()
+
+    if business is None:
         return Response(status=HTTP_404_NOT_FOUND)
 
     add_business_profile_visits(request.user, business)
@@ -140,22 +154,31 @@ def search_business(request):
     data = request.data
 
     value = data.get("value")
-    offset = data.get("offset")
+    cursor, offset = get_page_params(data)
     serializer = CreateCoordinateSerializer(data=data.get("coordinate"))
 
-    up_offset = offset + QueryLimits.SEARCH_BUSINESS_LIMIT
+    user_position = serializer.validated_data if serializer.is_valid() else None
 
-    if value == "" and serializer.is_valid():
-        user_position = serializer.validated_data
-        businesses = get_nearest_businesses(user_position, offset)
+    if value == "" and user_position is not None:
+        page = get_nearest_businesses(user_position, cursor=cursor, offset=offset)
     else:
-        businesses = Business.objects.only_approved().filter(name__icontains=value)[
-            offset:up_offset
-        ]
+        businesses = search_businesses(
+            Business.objects.only_approved(), value or "", position=user_position
+        )
 
-    businesses = ShortBusinessSerializer(businesses, many=True)
+        page = paginate(
+            businesses,
+            ("-rank", "id"),
+            QueryLimits.SEARCH_BUSINESS_LIMIT,
+            cursor=cursor,
+            offset=offset,
+        )
+
+    businesses = ShortBusinessSerializer(page.items, many=True)
 
-    return Response(businesses.data, status=HTTP_200_OK)
+    return Response(
+        businesses.data, status=HTTP_200_OK, headers=get_page_headers(page)
+    )
 
 
 @api_view(["POST"])
@@ -165,7 +188,7 @@ def get_ranked_businesses(request):
     place_id = data.get("place_id")
     category = data.get("category")
 
-    venues = Business.objects.get_business_rank(place_id, category)
+    venues = get_top_businesses(place_id, category, request.user)
     venues = BusinessSerializer(venues, many=True, context={"req": request})
 
     return Response(venues.data, status=HTTP_200_OK)
@@ -214,12 +237,10 @@ class BusinessLikeAPIView(APIView):
 
             params = (request.user, business)
 
-            if profile in likes.all():
-                likes.remove(profile)
-                remove_business_like(*params)
-            else:
-                likes.add(profile)
+            if toggle_member(likes, profile):
                 add_business_like(*params)
+            else:
+                remove_business_like(*params)
 
             return Response(status=HTTP_200_OK)
 
@@ -230,12 +251,9 @@ class BusinessLikeAPIView(APIView):
     def post(self, request):
         profile = request.user.profile
 
-        venues = []
-        queryset = Business.objects.all()
-
-        for venue in queryset:
-            if profile in venue.likes.all():
-                venues.append(venue)
+        venues = get_businesses_with_details(
+            Business.objects.filter(likes=profile), request.user
+        )
 
         businesses = BusinessSerializer(venues, many=True, context={"req": request})
         return Response(businesses.data, status=HTTP_200_OK)
@@ -250,10 +268,12 @@ def get_businesses_spot(request):
     if serializer.is_valid():
         data = serializer.validated_data
 
-        businesses = get_businesses_for_spot(data)
-        businesses = ShortBusinessSerializer(businesses, many=True)
+        page = get_businesses_for_spot(data)
+        businesses = ShortBusinessSerializer(page.items, many=True)
 
-        return Response(businesses.data, status=HTTP_200_OK)
+        return Response(
+            businesses.data, status=HTTP_200_OK, headers=get_page_headers(page)
+        )
 
     print(serializer.errors)
 
@@ -283,25 +303,23 @@ class BusinessFeaturesAPIView(AuthenticationMixinAPIView):
         amenities = []
 
         language = request.user.language
-        context = {"language": language}
-
-        kwargs = {"context": context, "many": True}
+        catalog = get_catalog()
 
-        if endpoint == "both":
-            categories = BusinessCategory.objects.all().order_by("-weight")
-            categories = StaticFeatureSerializer(categories, **kwargs).data
+        # Apps send back the etag and only download the catalog when it changed,
+        # each endpoint returns a different body so it has its own validator
+        etag = f'"{catalog.version}-{endpoint}-{language}"'
 
-            amenities = Amenity.objects.all().order_by("-weight")
-            amenities = StaticFeatureSerializer(amenities, **kwargs).data
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-        if endpoint == "categories":
-            categories = BusinessCategory.objects.all().order_by("-weight")
-            categories = StaticFeatureSerializer(categories, **kwargs).data
+        if endpoint in ("both", "categories"):
+            categories = catalog.get_features("categories", language)
 
-        if endpoint == "amenities":
-            amenities = Amenity.objects.all().order_by("-weight")
-            amenities = StaticFeatureSerializer(amenities, **kwargs).data
+        if endpoint in ("both", "amenities"):
+            amenities = catalog.get_features("amenities", language)
 
         return Response(
-            {"amenities": amenities, "categories": categories}, status=HTTP_200_OK
+            {"amenities": amenities, "categories": categories},
+            status=HTTP_200_OK,
+            headers={"ETag": etag},
         )
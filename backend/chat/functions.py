@@ -1,18 +1,18 @@
-from itertools import chain
-
 from business.models import Business
 from core.querylimits import QueryLimits
-from discussions.models import EventDiscussion
 from discussions.serializers import EventDiscussionSerializer
 from profiles.models import UserProfile
+from .inbox import (
+    get_conversation,
+    get_inbox,
+    get_inbox_read_states,
+    get_read_states,
+    get_read_states_key,
+)
 from .models import BusinessChat, Chat, ChatMessage
 from .serializers import BusinessChatSerializer, ChatSerializer
 
 
-def last_update_key(chat):
-    return chat.updated_at
-
-
 def get_my_chats(user, offset=0):
     profile = user.profile
 
@@ -20,25 +20,20 @@ def get_my_chats(user, offset=0):
 
     is_business = isinstance(user, Business)
 
-    business_chats = BusinessChat.objects.filter(user=profile)
-
-    user_chats = []
-    discussions = []
+    entries = get_inbox(profile)
 
-    if not is_business:
-        user_chats = Chat.objects.get_my_chats(profile)
-        discussions = EventDiscussion.objects.filter(members__in=[profile])
+    if is_business:
+        entries = entries.filter(business_chat__isnull=False)
 
-    all_chats = chain(user_chats, business_chats, discussions)
-    ordered_chats = sorted(all_chats, key=last_update_key)
-    ordered_chats.reverse()
-
-    chats = list(ordered_chats)[offset:up_offset]
+    entries = list(entries[offset:up_offset])
+    chats = [get_conversation(entry) for entry in entries]
 
     response = []
 
-    context = {"user": profile}
-    business_chat_context = {"is_user": True}
+    read_states = get_inbox_read_states(entries)
+
+    context = {"user": profile, **read_states}
+    business_chat_context = {"is_user": True, **read_states}
 
     for chat in chats:
         if isinstance(chat, Chat):
@@ -56,14 +51,17 @@ def get_my_chats(user, offset=0):
 
 
 def get_business_chats(business, offset):
-    chats = BusinessChat.objects.filter(business=business)[
-            offset: offset + QueryLimits.CHAT_LIST
-            ]
+    chats = (
+        BusinessChat.objects.filter(business=business)
+        .select_related("user__user")
+        .order_by("-updated_at", "-id")[offset : offset + QueryLimits.CHAT_LIST]
+    )
+
+    read_states = get_read_states("business_chat", [chat.id for chat in chats])
 
-    ordered_chats = sorted(chats, key=last_update_key)
-    ordered_chats.reverse()
+    context = {"is_user": False, get_read_states_key("business_chat"): read_states}
 
-    chats = BusinessChatSerializer(ordered_chats, context={"is_user": False}, many=True)
+    chats = BusinessChatSerializer(chats, context=context, many=True)
     return chats.data
 
 
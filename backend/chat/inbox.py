@@ -0,0 +1,286 @@
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from chat.models import BusinessChat, Chat, InboxEntry
+from discussions.models import EventDiscussion
+
+"""
+    The inbox keeps one entry per participant and conversation, so the chat
+    tab is sorted and paginated by the database. Entries are written when a
+    message is sent, or when a profile joins a discussion, and are removed
+    with their conversation.
+
+    Each entry is also the read state of its profile: a message is read when
+    it was sent before the last_read_at watermark of its receiver, so reading
+    a conversation is a single row update.
+"""
+
+INBOX_FIELDS = {
+    Chat: "chat",
+    BusinessChat: "business_chat",
+    EventDiscussion: "discussion",
+}
+
+
+def get_conversation(entry):
+    return entry.chat or entry.business_chat or entry.discussion
+
+
+# Creates or moves the entries of the profiles to the given date,
+# unread_ids are the profiles that received a new message
+def touch_inbox(conversation, profile_ids, last_message_at, unread_ids=()):
+    field = INBOX_FIELDS[type(conversation)]
+
+    entries = [
+        InboxEntry(
+            profile_id=profile_id,
+            last_message_at=last_message_at,
+            **{field: conversation},
+        )
+        for profile_id in set(profile_ids)
+    ]
+
+    InboxEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=[field, "profile"],
+        update_fields=["last_message_at"],
+    )
+
+    if unread_ids:
+        InboxEntry.objects.filter(
+            profile__in=set(unread_ids), **{field: conversation}
+        ).update(unread_count=F("unread_count") + 1)
+
+
+def read_inbox(conversation_id, profile, field="chat"):
+    entries = InboxEntry.objects.filter(
+        profile=profile, **{f"{field}_id": conversation_id}
+    )
+
+    entries.update(last_read_at=timezone.now(), unread_count=0)
+
+
+def read_business_chat(chat_id):
+    BusinessChat.objects.filter(id=chat_id).update(
+        business_last_read_at=timezone.now(), business_unread_count=0
+    )
+
+
+def add_business_unread(chat):
+    BusinessChat.objects.filter(id=chat.id).update(
+        business_unread_count=F("business_unread_count") + 1
+    )
+
+    chat.refresh_from_db(fields=["business_unread_count"])
+
+
+# Serializers keep the read states of each conversation type under this key
+def get_read_states_key(field):
+    return f"{field}_read_states"
+
+
+# Returns {conversation id: {profile id: entry}}
+def get_read_states(field, conversation_ids):
+    states = {id: {} for id in conversation_ids}
+
+    entries = InboxEntry.objects.filter(**{f"{field}__in": list(states)}).only(
+        field, "profile", "last_read_at", "unread_count"
+    )
+
+    for entry in entries:
+        states[getattr(entry, f"{field}_id")][entry.profile_id] = entry
+
+    return states
+
+
+# Returns {profile id: last_read_at} to tell which messages were read
+def get_read_watermarks(states):
+    return {profile_id: entry.last_read_at for profile_id, entry in states.items()}
+
+
+def is_read(message, read_at):
+    return read_at is not None and message.created_at <= read_at
+
+
+def get_business_chat_watermarks(chat):
+    entry = get_read_states("business_chat", [chat.id])[chat.id].get(chat.user_id)
+
+    return {
+        "user_read_at": None if entry is None else entry.last_read_at,
+        "business_read_at": chat.business_last_read_at,
+    }
+
+
+# Read states of a page of the inbox, the page has the entries of the profile
+# so only chats need a query, for the watermark of the other participant
+def get_inbox_read_states(entries):
+    chat_ids = []
+
+    business_chat_states = {}
+    discussion_states = {}
+
+    for entry in entries:
+        if entry.chat_id is not None:
+            chat_ids.append(entry.chat_id)
+        elif entry.business_chat_id is not None:
+            business_chat_states[entry.business_chat_id] = {entry.profile_id: entry}
+        else:
+            discussion_states[entry.discussion_id] = {entry.profile_id: entry}
+
+    return {
+        get_read_states_key("chat"): get_read_states("chat", chat_ids),
+        get_read_states_key("business_chat"): business_chat_states,
+        get_read_states_key("discussion"): discussion_states,
+    }
+
+
+def remove_from_inbox(conversation, profile_ids=None):
+    field = INBOX_FIELDS[type(conversation)]
+
+    entries = InboxEntry.objects.filter(**{field: conversation})
+
+    if profile_ids is not None:
+        entries = entries.filter(profile__in=profile_ids)
+
+    entries.delete()
+
+
+# Anonymous messages are only visible to their receiver
+def get_chat_message_readers(message):
+    if message.is_anonymous:
+        return [message.receiver_id]
+
+    return [message.sender_id, message.receiver_id]
+
+
+def get_inbox(profile):
+    blocked_users = profile.blocked_users.all()
+
+    return (
+        InboxEntry.objects.filter(profile=profile)
+        .exclude(chat__sender__in=blocked_users)
+        .exclude(chat__receiver__in=blocked_users)
+        .select_related(
+            "chat__sender__user",
+            "chat__receiver__user",
+            "business_chat__business",
+            "discussion__event",
+        )
+        .order_by("-last_message_at", "-id")
+    )
+
+
+"""
+    Builds the entries of the conversations, with their read state from the seen
+    flags of the messages. Without reset existing entries are kept, so it only
+    adds the missing ones and can run on every deploy. Entries written by live
+    messages meanwhile win over the built ones.
+"""
+
+
+def rebuild_inbox(reset=False, chunk_size=1000):
+    if reset:
+        InboxEntry.objects.all().delete()
+
+    entries = []
+
+    for field in ("sender", "receiver"):
+        visible = Q(chatmessage__is_anonymous=False) | Q(chatmessage__receiver=F(field))
+        received = Q(chatmessage__receiver=F(field))
+        seen = Q(chatmessage__seen=True)
+
+        chats = (
+            Chat.objects.annotate(
+                last_message_at=Max("chatmessage__created_at", filter=visible),
+                last_read_at=Max("chatmessage__created_at", filter=received & seen),
+                unread_count=Count("chatmessage", filter=received & ~seen),
+            )
+            .filter(last_message_at__isnull=False)
+            .values_list(
+                "id", field, "last_message_at", "last_read_at", "unread_count"
+            )
+        )
+
+        entries += [
+            InboxEntry(
+                chat_id=id,
+                profile_id=profile_id,
+                last_message_at=date,
+                last_read_at=read_at,
+                unread_count=unread_count,
+            )
+            for id, profile_id, date, read_at, unread_count in chats
+        ]
+
+    # The user received the messages of the business, which have a user
+    received = Q(businesschatmessage__user__isnull=False)
+    seen = Q(businesschatmessage__seen=True)
+
+    business_chats = BusinessChat.objects.annotate(
+        last_read_at=Max("businesschatmessage__created_at", filter=received & seen),
+        unread_count=Count("businesschatmessage", filter=received & ~seen),
+    ).values_list("id", "user", "updated_at", "last_read_at", "unread_count")
+
+    entries += [
+        InboxEntry(
+            business_chat_id=id,
+            profile_id=profile_id,
+            last_message_at=date,
+            last_read_at=read_at,
+            unread_count=unread_count,
+        )
+        for id, profile_id, date, read_at, unread_count in business_chats
+    ]
+
+    rebuild_business_read_states(reset, chunk_size)
+
+    members = EventDiscussion.members.through.objects.values_list(
+        "eventdiscussion", "userprofile", "eventdiscussion__updated_at"
+    )
+
+    # Discussions had no read state, members start with everything read
+    entries += [
+        InboxEntry(
+            discussion_id=id,
+            profile_id=profile_id,
+            last_message_at=date,
+            last_read_at=date,
+        )
+        for id, profile_id, date in members
+    ]
+
+    created = InboxEntry.objects.bulk_create(
+        entries, batch_size=chunk_size, ignore_conflicts=True
+    )
+
+    return len(created)
+
+
+# Without reset only the chats the business never read are built
+def rebuild_business_read_states(reset=False, chunk_size=1000):
+    # The business received the messages of the user, which have no user
+    received = Q(businesschatmessage__user__isnull=True)
+    seen = Q(businesschatmessage__seen=True)
+
+    queryset = BusinessChat.objects.all()
+
+    if not reset:
+        queryset = queryset.filter(business_last_read_at__isnull=True)
+
+    chats = list(
+        queryset.annotate(
+            last_read_at=Max("businesschatmessage__created_at", filter=received & seen),
+            unread_count=Count("businesschatmessage", filter=received & ~seen),
+        ).only("id")
+    )
+
+    for chat in chats:
+        chat.business_last_read_at = chat.last_read_at
+        chat.business_unread_count = chat.unread_count
+
+    BusinessChat.objects.bulk_update(
+        chats,
+        ["business_last_read_at", "business_unread_count"],
+        batch_size=chunk_size,
+    )
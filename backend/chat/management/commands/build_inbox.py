@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from chat.inbox import rebuild_inbox
+
+
+class Command(BaseCommand):
+    help = "Build the missing inbox entries of the chats and discussions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete every entry and its read state before building",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_inbox(reset=options["reset"])
+
+        self.stdout.write(self.style.SUCCESS(f"Built {count} inbox entries"))
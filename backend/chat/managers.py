@@ -58,27 +58,6 @@ class ChatMessageManager(MessageManager):
 
 
 class ChatManager(Manager):
-    def _get_chats(self, profile):
-        queryset = self.get_queryset()
-        blocked_users = profile.blocked_users.all()
-
-        from .models import ChatMessage
-
-        queryset = queryset.filter(
-            (Q(sender=profile) | Q(receiver=profile))
-            & Q(~Q(sender__in=blocked_users) & ~Q(receiver__in=blocked_users))
-        )
-
-        chats = []
-
-        for chat in queryset:
-            messages = ChatMessage.objects.get_messages(chat.id, profile)
-
-            if messages.exists():
-                chats.append(chat)
-
-        return chats
-
     def create(self, **kwargs):
         sender = kwargs.get("sender")
         receiver = kwargs.get("receiver")
@@ -87,9 +66,6 @@ class ChatManager(Manager):
 
         return super().create(is_active=are_friends, **kwargs)
 
-    def get_my_chats(self, user):
-        return self._get_chats(user)
-
     def get_chat(self, user, receiver):
         chats = self.get_queryset().filter(
             Q(sender=user, receiver=receiver) | Q(sender=receiver, receiver=user)
@@ -106,11 +82,6 @@ class ChatManager(Manager):
 
         return chat
 
-    def get_recent(self, user):
-        chats = self.get_my_chats(user)
-        ord_chats = sorted(chats, key=lambda x: x.updated_at, reverse=True)
-        return ord_chats
-
     # Remove chat when user block another user
     def remove_blocked(self, *args):
         chats = self.get_chat(*args)
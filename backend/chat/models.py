@@ -116,7 +116,10 @@ class Chat(AbstractChat):
     objects = ChatManager()
 
     class Meta:
-        indexes = [models.Index(fields=["sender", "receiver"])]
+        indexes = [
+            models.Index(fields=["sender", "receiver"]),
+            models.Index(fields=["receiver", "sender"]),
+        ]
 
     def __str__(self):
         return f"{self.id} • {self.sender.username} • {self.receiver.username}"
@@ -128,6 +131,10 @@ class BusinessChat(AbstractChat):
         "business.Business", db_index=False, **foreignkey_params
     )
 
+    # Read state of the business side, the user side is in its inbox entry
+    business_last_read_at = models.DateTimeField(blank=True, null=True)
+    business_unread_count = models.PositiveIntegerField(default=0)
+
     objects = BusinessChatManager()
 
     class Meta:
@@ -154,3 +161,56 @@ class BusinessChatMessage(TimestampModel):
 
     def __str__(self):
         return f"{self.chat.id} • {self.content}"
+
+
+"""
+    One row per participant and conversation, the chat tab is read from here.
+    Exactly one of chat, business_chat and discussion is set, last_message_at
+    is the date of the last message the profile can see.
+
+    Messages sent before last_read_at are read, unread_count is kept by the
+    message signals and reset when the profile reads the conversation.
+"""
+
+
+class InboxEntry(models.Model):
+    profile = models.ForeignKey(
+        "profiles.UserProfile", on_delete=CASCADE, db_index=False, related_name="inbox"
+    )
+
+    chat = models.ForeignKey("Chat", db_index=False, **foreignkey_params)
+    business_chat = models.ForeignKey(
+        "BusinessChat", db_index=False, **foreignkey_params
+    )
+    discussion = models.ForeignKey(
+        "discussions.EventDiscussion", db_index=False, **foreignkey_params
+    )
+
+    last_message_at = models.DateTimeField()
+
+    last_read_at = models.DateTimeField(blank=True, null=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["profile", "-last_message_at", "-id"],
+                name="%(app_label)s_inbox_ix",
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["chat", "profile"], name="%(app_label)s_inbox_chat_unique"
+            ),
+            models.UniqueConstraint(
+                fields=["business_chat", "profile"],
+                name="%(app_label)s_inbox_business_chat_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["discussion", "profile"],
+                name="%(app_label)s_inbox_discussion_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id} • {self.last_message_at}"
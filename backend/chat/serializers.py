@@ -7,8 +7,13 @@ from profiles.serializers import (
     ShortUserProfileSerializer,
     ShortUserProfileSerializer,
 )
+from .inbox import (
+    get_read_states,
+    get_read_states_key,
+    get_read_watermarks,
+    is_read,
+)
 from .models import BusinessChatMessage, ChatMessage
-from users.models import User
 
 MESSAGE_SERIALIZER_FIELDS = (
     "id",
@@ -62,6 +67,7 @@ class MessageSerializer(serializers.Serializer):
 class ChatMessageSerializer(MessageSerializer):
     sender = serializers.SerializerMethodField()
     receiver = serializers.SerializerMethodField()
+    seen = serializers.SerializerMethodField()
     is_anonymous = serializers.BooleanField()
 
     class Meta:
@@ -74,8 +80,40 @@ class ChatMessageSerializer(MessageSerializer):
     def get_receiver(self, chat):
         return chat.receiver.user.uuid
 
+    # Read when the receiver has read the chat after the message, see "read_at"
+    def get_seen(self, message):
+        read_at = self.context.get("read_at", {}).get(message.receiver_id)
+        return is_read(message, read_at)
+
+
+"""
+    Read states are kept in the context, so the serializers of a list share
+    them. Callers can fill them for a whole page, the missing ones are
+    loaded per conversation.
+"""
+
+
+class ReadStatesMixin(object):
+    inbox_field = None
+
+    def get_read_states(self, conversation):
+        key = get_read_states_key(self.inbox_field)
+        states = self.context.setdefault(key, {})
+
+        if conversation.id not in states:
+            states.update(get_read_states(self.inbox_field, [conversation.id]))
 
-class ChatSerializer(serializers.Serializer):
+        return states[conversation.id]
+
+    def get_unread_count_of(self, conversation, profile):
+        if profile is None:
+            return 0
+
+        entry = self.get_read_states(conversation).get(profile.id)
+        return 0 if entry is None else entry.unread_count
+
+
+class ChatSerializer(ReadStatesMixin, serializers.Serializer):
     id = serializers.SerializerMethodField()
     receiver = serializers.SerializerMethodField()
     messages = serializers.SerializerMethodField()
@@ -83,6 +121,8 @@ class ChatSerializer(serializers.Serializer):
     muted = serializers.SerializerMethodField()
     is_active = serializers.BooleanField()
 
+    inbox_field = "chat"
+
     def _get_profile(self):
         user = self.context.get("user")
 
@@ -107,24 +147,16 @@ class ChatSerializer(serializers.Serializer):
     def get_messages(self, chat):
         profile = self._get_profile()
 
+        read_at = get_read_watermarks(self.get_read_states(chat))
+        context = {**self.context, "read_at": read_at}
+
         messages = ChatMessage.objects.get_messages(chat.id, profile)[:10]
-        messages = ChatMessageSerializer(messages, context=self.context, many=True)
+        messages = ChatMessageSerializer(messages, context=context, many=True)
 
         return messages.data
 
     def get_unread_count(self, chat):
-        user = self.context.get("user")
-
-        profile = user
-
-        if isinstance(user, User):
-            profile = user.profile
-
-        return (
-            ChatMessage.objects.get_messages(chat.id, profile)
-            .filter(receiver=profile, seen=False)
-            .count()
-        )
+        return self.get_unread_count_of(chat, self._get_profile())
 
     def get_muted(self, chat):
         user = self.context.get("user")
@@ -138,14 +170,23 @@ class BusinessChatMessageSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     created_at = serializers.CharField()
     content = serializers.CharField()
-    seen = serializers.BooleanField()
+    seen = serializers.SerializerMethodField()
     is_user = serializers.SerializerMethodField()
 
     def get_is_user(self, message):
         return message.user is None
 
+    # Messages of the user are read by the business and the other way around
+    def get_seen(self, message):
+        if message.user is None:
+            read_at = self.context.get("business_read_at")
+        else:
+            read_at = self.context.get("user_read_at")
+
+        return is_read(message, read_at)
+
 
-class BusinessChatSerializer(serializers.Serializer):
+class BusinessChatSerializer(ReadStatesMixin, serializers.Serializer):
     id = serializers.SerializerMethodField()
     user = serializers.SerializerMethodField()
     business = serializers.SerializerMethodField()
@@ -153,6 +194,8 @@ class BusinessChatSerializer(serializers.Serializer):
     unread_count = serializers.SerializerMethodField()
     muted = serializers.SerializerMethodField()
 
+    inbox_field = "business_chat"
+
     # Used to know who wants to retrieve the chats, user or business.
     def is_user(self):
         return self.context.get("is_user") is True
@@ -171,16 +214,22 @@ class BusinessChatSerializer(serializers.Serializer):
         return None
 
     def get_messages(self, instance):
+        entry = self.get_read_states(instance).get(instance.user_id)
+
+        context = {
+            "user_read_at": None if entry is None else entry.last_read_at,
+            "business_read_at": instance.business_last_read_at,
+        }
+
         messages = BusinessChatMessage.objects.filter(chat=instance)[:10]
-        return BusinessChatMessageSerializer(messages, many=True).data
+        return BusinessChatMessageSerializer(messages, context=context, many=True).data
 
     def get_unread_count(self, chat):
-        queryset = BusinessChatMessage.objects.filter(chat=chat)
-
         if self.is_user():
-            return queryset.filter(seen=False).exclude(user=None).count()
+            entry = self.get_read_states(chat).get(chat.user_id)
+            return 0 if entry is None else entry.unread_count
 
-        return queryset.filter(user=None, seen=False).count()
+        return chat.business_unread_count
 
     def get_muted(self, chat):
         if self.is_user():
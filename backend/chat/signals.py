@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from chat.inbox import add_business_unread, get_chat_message_readers, touch_inbox
 from chat.serializers import BusinessChatSerializer, ChatSerializer
 from devices.models import Device
 from devices.utils import NotificationType
@@ -9,6 +10,34 @@ from websocket.utils import send_data_to_socket_channel
 from .models import BusinessChatMessage, ChatMessage
 
 
+# Inbox receivers come first, so the chats sent below have the new counters
+@receiver(post_save, sender=ChatMessage)
+def on_user_message_created(instance, created, **_):
+    if created:
+        message = instance
+
+        readers = get_chat_message_readers(message)
+        unread_ids = [message.receiver_id]
+
+        touch_inbox(message.chat, readers, message.created_at, unread_ids)
+
+
+@receiver(post_save, sender=BusinessChatMessage)
+def on_business_message_created(instance, created, **_):
+    if created:
+        message = instance
+        chat = message.chat
+
+        # Messages with a user are sent by the business
+        if message.user is not None:
+            unread_ids = [chat.user_id]
+        else:
+            unread_ids = []
+            add_business_unread(chat)
+
+        touch_inbox(chat, [chat.user_id], message.created_at, unread_ids)
+
+
 @receiver(post_save, sender=ChatMessage)
 def on_user_chat_created(instance, created, **_):
     message = instance
@@ -80,8 +109,3 @@ def on_business_chat_created(instance, created, **_):
             device.send_notification(
                 NotificationType.BUSINESS_MESSAGE, msg_sender, message
             )
-
-
-@receiver(post_save, sender=ChatMessage)
-def on_user_message_created(instance, created, **_):
-    pass
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from django.db.models.query_utils import Q
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -12,6 +13,13 @@ from authentication.decorators import authentication_mixin
 from authentication.decorators import business_authentication
 from business.models import Business
 from chat.functions import get_my_chats, get_business_chats, get_chat_model
+from chat.inbox import (
+    get_business_chat_watermarks,
+    get_read_states,
+    get_read_watermarks,
+    read_business_chat,
+    read_inbox,
+)
 from chat.models import (
     BusinessChat,
     BusinessChatMessage,
@@ -27,8 +35,10 @@ from chat.serializers import (
 )
 from insights.utils import add_share_to_event, add_share_to_business
 from moments.models import EventMoment, UserMoment
+from moments.utils import prefetch_moment_details
 from profiles.models import UserProfile
 from services.date import today_date
+from services.search import search_profiles
 from services.utils import cast_to_int
 from users.models import User
 
@@ -116,9 +126,19 @@ class MessagesViewSet(AuthenticationMixinViewSet):
         except Chat.DoesNotExist:
             return Response(status=HTTP_404_NOT_FOUND)
 
-        messages = ChatMessage.objects.get_messages(chat.id, profile)[offset:up_offset]
+        moments = prefetch_moment_details(UserMoment.objects.all(), profile)
+
+        messages = (
+            ChatMessage.objects.get_messages(chat.id, profile)
+            .select_related("sender__user", "receiver__user")
+            .prefetch_related(Prefetch("moment", queryset=moments))
+        )
+        messages = messages[offset:up_offset]
+
+        read_at = get_read_watermarks(get_read_states("chat", [chat.id])[chat.id])
+
         messages = ChatMessageSerializer(
-            messages, context={"user": request.user}, many=True
+            messages, context={"user": request.user, "read_at": read_at}, many=True
         )
 
         return Response(messages.data, status=HTTP_200_OK)
@@ -126,8 +146,15 @@ class MessagesViewSet(AuthenticationMixinViewSet):
     def business_messages(self, request):
         chat_id, offset, up_offset = self._get_params(request)
 
+        try:
+            chat = BusinessChat.objects.get(id=chat_id)
+        except BusinessChat.DoesNotExist:
+            return Response(status=HTTP_404_NOT_FOUND)
+
+        context = get_business_chat_watermarks(chat)
+
         messages = BusinessChatMessage.objects.get_messages(chat_id)[offset:up_offset]
-        messages = BusinessChatMessageSerializer(messages, many=True)
+        messages = BusinessChatMessageSerializer(messages, context=context, many=True)
 
         return Response(messages.data, status=HTTP_200_OK)
 
@@ -155,9 +182,7 @@ def read_messages(request):
 
     chat_id = params.get("chat_id")
 
-    ChatMessage.objects.get_messages(chat_id, profile).exclude(
-        sender=request.user.profile
-    ).update(seen=True)
+    read_inbox(chat_id, profile)
 
     return Response(status=HTTP_200_OK)
 
@@ -173,9 +198,11 @@ def search_chats(request):
 
     profile = request.user.profile
 
+    users = search_profiles(UserProfile.objects.exclude(id=profile.id), value)
+    users = users.values("id")
+
     chats = Chat.objects.filter(
-        Q(~Q(sender=profile) & Q(sender__username__icontains=value))
-        | Q(~Q(receiver=profile) & Q(receiver__username__icontains=value))
+        Q(sender=profile, receiver__in=users) | Q(receiver=profile, sender__in=users)
     )
     chats = ChatSerializer(chats, context={"user": profile}, many=True)
 
@@ -427,13 +454,9 @@ def read_business_chat_messages(request):
     chat_id = params.get("chat_id")
     is_user = params.get("is_user")
 
-    queryset = BusinessChatMessage.objects.filter(chat__id=chat_id, seen=False)
-
     if is_user == "true":
-        queryset = queryset.exclude(user=None)
+        read_inbox(chat_id, request.user.profile, "business_chat")
     else:
-        queryset = queryset.filter(user=None)
-
-    queryset.update(seen=True)
+        read_business_chat(chat_id)
 
     return Response(status=HTTP_200_OK)
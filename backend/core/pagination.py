@@ -0,0 +1,236 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+
+from django.contrib.gis.measure import Distance as MeasureDistance
+from django.core.exceptions import ValidationError
+from django.db.models.query_utils import Q
+from rest_framework.exceptions import ParseError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorPage(object):
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+"""
+    Cursors are opaque to clients: they are the sort tuple of the last item
+    of a page, encoded as url safe base64 json. A cursor that can't be read
+    is rejected with a 400, instead of restarting from the first page.
+"""
+
+CURSOR_VALUE_TYPES = (str, int, float, bool, type(None))
+
+
+def encode_value(value):
+    if isinstance(value, MeasureDistance):
+        return value.m
+
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+
+    return value
+
+
+def encode_cursor(values):
+    data = json.dumps([encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def get_invalid_cursor_error():
+    return ParseError("Invalid cursor")
+
+
+# Returns the values of the cursor, one for each of the ordering fields
+def decode_cursor(cursor, fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        raise get_invalid_cursor_error()
+
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise get_invalid_cursor_error()
+
+    if not all(isinstance(value, CURSOR_VALUE_TYPES) for value in values):
+        raise get_invalid_cursor_error()
+
+    return values
+
+
+def get_ordering_field(queryset, name):
+    annotation = queryset.query.annotations.get(name)
+
+    if annotation is not None:
+        return annotation.output_field
+
+    return queryset.model._meta.get_field(name)
+
+
+# Converts the values of the cursor to the types of the ordering fields
+def parse_cursor_values(queryset, fields, values):
+    try:
+        return [
+            value
+            if value is None
+            else get_ordering_field(queryset, field).to_python(value)
+            for (field, _), value in zip(fields, values)
+        ]
+    except (ValidationError, ValueError, TypeError):
+        raise get_invalid_cursor_error()
+
+
+def parse_ordering(ordering):
+    ordering = list(ordering)
+
+    if "id" not in ordering and "-id" not in ordering:
+        ordering.append("id")
+
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+"""
+    Builds the filter for the rows that come after the cursor.
+    Follows postgres ordering: nulls are last ascending and first descending.
+"""
+
+
+def get_after_cursor_filter(fields, values):
+    (field, descending), *next_fields = fields
+    value, *next_values = values
+
+    is_null = Q(**{f"{field}__isnull": True})
+
+    if value is None:
+        after = ~is_null if descending else None
+        equal = is_null
+    else:
+        lookup = "lt" if descending else "gt"
+        after = Q(**{f"{field}__{lookup}": value})
+        equal = Q(**{field: value})
+
+        if not descending:
+            after |= is_null
+
+    if next_fields:
+        tie = equal & get_after_cursor_filter(next_fields, next_values)
+        return tie if after is None else after | tie
+
+    return Q(pk__in=[]) if after is None else after
+
+
+"""
+    Returns a CursorPage of at most `limit` items.
+    When no cursor is given the old `offset` is used, so clients can migrate.
+"""
+
+
+def paginate(queryset, ordering, limit, cursor=None, offset=0):
+    fields = parse_ordering(ordering)
+
+    queryset = queryset.order_by(
+        *[f"-{field}" if descending else field for field, descending in fields]
+    )
+
+    if cursor:
+        values = parse_cursor_values(queryset, fields, decode_cursor(cursor, fields))
+        items = list(
+            queryset.filter(get_after_cursor_filter(fields, values))[: limit + 1]
+        )
+    else:
+        offset = offset or 0
+        items = list(queryset[offset : offset + limit + 1])
+
+    next_cursor = None
+
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field) for field, _ in fields])
+
+    return CursorPage(items, next_cursor)
+
+
+# Same null ordering as postgres: nulls are last ascending and first descending
+def compare_values(value, other, descending):
+    if value == other:
+        return 0
+
+    if value is None:
+        result = 1
+    elif other is None:
+        result = -1
+    else:
+        result = -1 if value < other else 1
+
+    return -result if descending else result
+
+
+def is_after_cursor(entry, fields, values):
+    for index, (_, descending) in enumerate(fields):
+        result = compare_values(entry[index], values[index], descending)
+
+        if result != 0:
+            return result > 0
+
+    return False
+
+
+"""
+    Same as paginate but for an already sorted list of sort tuples, e.g. a cached
+    result. Each entry holds the values of the ordering fields, id included.
+"""
+
+
+def paginate_entries(entries, ordering, limit, cursor=None, offset=0):
+    fields = parse_ordering(ordering)
+
+    if cursor:
+        values = decode_cursor(cursor, fields)
+
+        try:
+            start = next(
+                (
+                    index
+                    for index, entry in enumerate(entries)
+                    if is_after_cursor(entry, fields, values)
+                ),
+                len(entries),
+            )
+        except TypeError:
+            raise get_invalid_cursor_error()
+    else:
+        start = offset or 0
+
+    items = entries[start : start + limit + 1]
+
+    next_cursor = None
+
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1])
+
+    return CursorPage(items, next_cursor)
+
+
+def get_page_params(data):
+    cursor = data.get("cursor") or None
+    offset = data.get("offset") or 0
+
+    try:
+        offset = int(offset)
+    except (ValueError, TypeError):
+        offset = 0
+
+    return cursor, offset
+
+
+# The body stays a plain list, the next cursor travels in a header
+def get_page_headers(page):
+    if page.next_cursor is None:
+        return None
+
+    return {NEXT_CURSOR_HEADER: page.next_cursor}
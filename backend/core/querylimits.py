@@ -21,3 +21,5 @@ class QueryLimits(object):
     SEARCH_BUSINESS_LIMIT = 10
 
     BUSINESS_SPOT_LIMIT = 8
+
+    BUSINESS_RANKING = 10
@@ -1,4 +1,14 @@
 from django.db import models
+from django.db.models import Q
+
+NOTIFICATIONS_LOOKUP = "user__profile__settings__notifications"
+
+
+# Profiles whose setting has the value. A missing key is NULL in SQL, so the
+# key must exist for the exclude to keep those profiles, as the defaults do
+def has_notification_setting(name, value):
+    key = f"{NOTIFICATIONS_LOOKUP}__{name}"
+    return Q(**{key: value}) & Q(**{f"{key}__isnull": False})
 
 
 class DeviceManager(models.Manager):
@@ -16,3 +26,22 @@ class DeviceManager(models.Manager):
 
     def logout(self, user):
         self.get_queryset().filter(user=user).update(is_logged=False, is_business=False)
+
+    # Logged user devices of the profiles, skipping the users that turned off
+    # all notifications or the given kind of them
+    def get_notifiable(self, profiles, setting=None):
+        queryset = (
+            self.get_queryset()
+            .filter(
+                user__profile__in=profiles,
+                is_logged=True,
+                is_business=False,
+                token__isnull=False,
+            )
+            .exclude(has_notification_setting("all", True))
+        )
+
+        if setting is not None:
+            queryset = queryset.exclude(has_notification_setting(setting, False))
+
+        return queryset
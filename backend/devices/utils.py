@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 
 import httpx
 import requests
@@ -13,6 +14,13 @@ from profiles.models import UserProfile
 from profiles.serializers import ShortUserProfileSerializer
 from services.apple_token import get_apns_apple_secret
 
+logger = logging.getLogger(__name__)
+
+FCM_URL = "https://fcm.googleapis.com/fcm/send"
+
+# Devices per concurrent batch, FCM takes up to 1000 per request
+NOTIFICATION_CHUNK_SIZE = 100
+
 
 class NotificationType:
     MESSAGE = "message"
@@ -190,23 +198,27 @@ def format_notification(notification_type, sender, message):
     return title, subtitle, body, payload
 
 
-def send_ios_notification(device_token, type, sender=None, message=None):
-    token = get_apns_apple_secret()
+def get_apns_url(device_token):
+    api_url = "api.push.apple.com"
 
-    client = httpx.AsyncClient(http2=True)
+    if settings.DEBUG:
+        api_url = "api.sandbox.push.apple.com"
 
-    headers = {
+    return f"https://{api_url}:443/3/device/{device_token}"
+
+
+def get_ios_headers():
+    token = get_apns_apple_secret()
+
+    return {
         "Content-Type": "application/json",
         "apns-topic": settings.IOS_APP_BUNDLE_ID,
         "Authorization": f"bearer {token}",
     }
 
-    title, subtitle, body, payload = format_notification(type, sender, message)
 
-    if body is None:
-        return False
-
-    payload = {
+def get_ios_payload(title, subtitle, body, payload):
+    return {
         "aps": {
             "alert": {"title": title, "body": body, "subtitle": subtitle},
             "badge": 1,
@@ -215,28 +227,32 @@ def send_ios_notification(device_token, type, sender=None, message=None):
         **payload,
     }
 
-    api_url = "api.push.apple.com"
 
-    if settings.DEBUG:
-        api_url = "api.sandbox.push.apple.com"
+def get_android_headers():
+    return {
+        "Content-Type": "application/json",
+        "Authorization": "key=" + settings.FIREBASE_API_KEY,
+    }
+
+
+def send_ios_notification(device_token, type, sender=None, message=None):
+    client = httpx.AsyncClient(http2=True)
+
+    title, subtitle, body, payload = format_notification(type, sender, message)
+
+    if body is None:
+        return False
+
+    payload = get_ios_payload(title, subtitle, body, payload)
 
     response = asyncio.run(
-        client.post(
-            f"https://{api_url}:443/3/device/{device_token}",
-            json=payload,
-            headers=headers,
-        )
+        client.post(get_apns_url(device_token), json=payload, headers=get_ios_headers())
     )
 
     return response.status_code == 200
 
 
 def send_android_notification(device_token, type, sender, message):
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": "key=" + settings.FIREBASE_API_KEY,
-    }
-
     title, subtitle, body, payload = format_notification(type, sender, message)
 
     if body is None:
@@ -251,8 +267,97 @@ def send_android_notification(device_token, type, sender, message):
 
     json_body = json.dumps(body)
 
-    response = requests.post(
-        "https://fcm.googleapis.com/fcm/send", headers=headers, data=json_body
-    )
+    response = requests.post(FCM_URL, headers=get_android_headers(), data=json_body)
 
     return response.status_code == 200
+
+
+"""
+    Fan-outs send the same notification to many devices: it is formatted once,
+    iOS chunks are concurrent requests on one http2 connection and each Android
+    chunk is a single FCM request.
+"""
+
+
+def get_chunks(items, size=NOTIFICATION_CHUNK_SIZE):
+    return [items[index : index + size] for index in range(0, len(items), size)]
+
+
+async def post_ios_notifications(tokens, payload, report):
+    headers = get_ios_headers()
+
+    async with httpx.AsyncClient(http2=True) as client:
+        for chunk in get_chunks(tokens):
+            responses = await asyncio.gather(
+                *[
+                    client.post(get_apns_url(token), json=payload, headers=headers)
+                    for token in chunk
+                ],
+                return_exceptions=True,
+            )
+
+            sent = sum(
+                1
+                for response in responses
+                if not isinstance(response, Exception) and response.status_code == 200
+            )
+
+            report(len(chunk), sent)
+
+
+def post_android_notifications(tokens, title, body, payload):
+    body = {
+        "notification": {"title": title, "body": body},
+        "registration_ids": tokens,
+        "priority": "high",
+        **payload,
+    }
+
+    try:
+        response = requests.post(
+            FCM_URL, headers=get_android_headers(), data=json.dumps(body)
+        )
+    except requests.RequestException:
+        return 0
+
+    if response.status_code != 200:
+        return 0
+
+    return response.json().get("success", 0)
+
+
+# Returns {"total", "sent", "failed"}, on_progress gets it after every chunk
+def send_bulk_notification(devices, type, sender=None, message=None, on_progress=None):
+    ios_tokens = [device.token for device in devices if not device.is_android]
+    android_tokens = [device.token for device in devices if device.is_android]
+
+    progress = {"total": len(ios_tokens) + len(android_tokens), "sent": 0, "failed": 0}
+
+    def report(count, sent):
+        progress["sent"] += sent
+        progress["failed"] += count - sent
+
+        if on_progress is not None:
+            on_progress(progress)
+
+    title, subtitle, body, payload = format_notification(type, sender, message)
+
+    if body is None or progress["total"] == 0:
+        return progress
+
+    if ios_tokens:
+        ios_payload = get_ios_payload(title, subtitle, body, payload)
+        asyncio.run(post_ios_notifications(ios_tokens, ios_payload, report))
+
+    for chunk in get_chunks(android_tokens):
+        report(len(chunk), post_android_notifications(chunk, title, body, payload))
+
+    if progress["failed"] > 0:
+        logger.warning(
+            "Notification %s failed for %d of %d devices",
+            type,
+            progress["failed"],
+            progress["total"],
+        )
+
+    return progress
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 
+from chat.serializers import ReadStatesMixin
 from discussions.models import EventDiscussionMessage
 from profiles.serializers import ShortUserProfileSerializer
+from services.relations import is_member
 
 
 class DiscussionEventSerializer(serializers.Serializer):
@@ -21,17 +23,15 @@ class EventDiscussionMessageSerializer(serializers.ModelSerializer):
         fields = ("id", "sender", "content", "created_at")
 
 
-'''
-    Don't forget the unread_count
-'''
-
-
-class EventDiscussionSerializer(serializers.Serializer):
+class EventDiscussionSerializer(ReadStatesMixin, serializers.Serializer):
     id = serializers.SerializerMethodField()
     event = DiscussionEventSerializer()
     messages = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
     muted = serializers.SerializerMethodField()
 
+    inbox_field = "discussion"
+
     def get_id(self, discussion):
         return f"discussion_{discussion.id}"
 
@@ -40,6 +40,9 @@ class EventDiscussionSerializer(serializers.Serializer):
         serialized = EventDiscussionMessageSerializer(messages, many=True)
         return serialized.data
 
+    def get_unread_count(self, discussion):
+        return self.get_unread_count_of(discussion, self.context.get("user"))
+
     def get_muted(self, discussion):
         user = self.context.get("user")
-        return user in discussion.muted_by.all()
+        return is_member(discussion.muted_by, user)
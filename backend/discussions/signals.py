@@ -1,10 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 
+from chat.inbox import get_read_states, remove_from_inbox, touch_inbox
+
 from devices.models import Device
 from devices.utils import NotificationType
-from discussions.models import EventDiscussionMessage
+from discussions.models import EventDiscussion, EventDiscussionMessage
 from discussions.serializers import EventDiscussionSerializer
+from services.relations import annotate_membership
 from websocket.actions import SocketActions
 from websocket.utils import send_data_to_socket_channel
 
@@ -17,16 +20,54 @@ def update_discussion_list(instance, created, **_):
         sender = message.sender
         discussion = message.discussion
 
+        member_ids = set(discussion.members.values_list("id", flat=True))
+        unread_ids = member_ids - {message.sender_id}
+
+        touch_inbox(discussion, member_ids, message.created_at, unread_ids)
+
         members = discussion.members.all().exclude(user=sender.user)
+        members = annotate_membership(members, discussion.muted_by, "is_muted")
+
+        new_discussion = EventDiscussionSerializer(discussion).data
 
-        for member in members:
+        # The messages are the same for every member, their read state is not
+        states = get_read_states("discussion", [discussion.id])[discussion.id]
+
+        for member in members.select_related("user"):
             channel_name = f"user.{member.user.uuid}"
 
-            new_discussion = EventDiscussionSerializer(discussion)
-            send_data_to_socket_channel(channel_name, SocketActions.CHAT, new_discussion.data)
+            entry = states.get(member.id)
+
+            member_discussion = {
+                **new_discussion,
+                "unread_count": 0 if entry is None else entry.unread_count,
+                "muted": member.is_muted,
+            }
+
+            send_data_to_socket_channel(
+                channel_name, SocketActions.CHAT, member_discussion
+            )
 
-            if member not in discussion.muted_by.all():
+            if not member.is_muted:
                 device = Device.objects.filter(user=member.user).first()
 
                 if device and not device.is_business:
                     device.send_notification(NotificationType.DISCUSSION_MESSAGE, sender, message)
+
+
+# Members are added and removed from the discussion side only
+@receiver(m2m_changed, sender=EventDiscussion.members.through)
+def on_discussion_members_changed(instance, action, reverse, pk_set, **_):
+    if reverse:
+        return
+
+    discussion = instance
+
+    if action == "post_add" and pk_set:
+        touch_inbox(discussion, pk_set, discussion.updated_at)
+
+    elif action == "post_remove" and pk_set:
+        remove_from_inbox(discussion, pk_set)
+
+    elif action == "post_clear":
+        remove_from_inbox(discussion)
@@ -1,9 +1,15 @@
 from django.urls import path
 
-from discussions.views import mute_discussion, delete_discussion, get_messages
+from discussions.views import (
+    delete_discussion,
+    get_messages,
+    mute_discussion,
+    read_discussion,
+)
 
 urlpatterns = [
     path("mute/", mute_discussion, name="mute_discussion"),
+    path("read/", read_discussion, name="read_discussion"),
     path("delete/", delete_discussion, name="delete_discussion"),
     path("messages/", get_messages, name="get_messages")
 ]
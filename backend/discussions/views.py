@@ -3,17 +3,20 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_404_NOT_FOUND, HTTP_200_OK
 
 from authentication.decorators import authentication_mixin
+from chat.inbox import read_inbox
 from discussions.models import EventDiscussion
 from discussions.serializers import EventDiscussionMessageSerializer
+from services.relations import toggle_member
 from services.utils import cast_to_int
 
 
 def get_discussion_or_none(request):
     discussion_id = (request.data or request.query_params).get("id")
 
+    # Non numeric ids can't match a discussion either
     try:
         return EventDiscussion.objects.get(id=discussion_id)
-    except EventDiscussion.DoesNotExist:
+    except (EventDiscussion.DoesNotExist, ValueError):
         return None
 
 
@@ -28,10 +31,20 @@ def mute_discussion(request):
     profile = request.user.profile
     muted_by = discussion.muted_by
 
-    if profile in muted_by.all():
-        muted_by.remove(profile)
-    else:
-        muted_by.add(profile)
+    toggle_member(muted_by, profile)
+
+    return Response(status=HTTP_200_OK)
+
+
+@api_view(["PUT"])
+@authentication_mixin
+def read_discussion(request):
+    discussion = get_discussion_or_none(request)
+
+    if discussion is None:
+        return Response(status=HTTP_404_NOT_FOUND)
+
+    read_inbox(discussion.id, request.user.profile, "discussion")
 
     return Response(status=HTTP_200_OK)
 
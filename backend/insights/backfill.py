@@ -0,0 +1,43 @@
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import TruncDate
+
+from insights.buffer import BUFFERED_MODELS, get_target_field
+
+"""
+    Insights recorded before the day field have it null, so the migration adding
+    the (user, target, day) constraint can't collide on them. The backfill sets
+    their day from created_at, and drops the rows that would count a user twice
+    on the same day, keeping the first one.
+"""
+
+
+def get_duplicate_insights(model):
+    field = get_target_field(model)
+
+    rows = model.objects.filter(day__isnull=True, created_at__isnull=False).annotate(
+        created_day=TruncDate("created_at")
+    )
+
+    day = OuterRef("created_day")
+
+    # A row of that day which is already dated, or undated and recorded earlier
+    same_day = model.objects.annotate(created_day=TruncDate("created_at")).filter(
+        Q(day=day) | Q(day__isnull=True, created_day=day, id__lt=OuterRef("id")),
+        user=OuterRef("user"),
+        **{field: OuterRef(field)},
+    )
+
+    return rows.filter(Exists(same_day))
+
+
+# Returns the number of rows that got their day
+def backfill_insight_days():
+    total = 0
+
+    for model in BUFFERED_MODELS.values():
+        get_duplicate_insights(model).delete()
+
+        rows = model.objects.filter(day__isnull=True, created_at__isnull=False)
+        total += rows.update(day=TruncDate("created_at"))
+
+    return total
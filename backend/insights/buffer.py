@@ -0,0 +1,176 @@
+import json
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from insights.models import (
+    BusinessLike,
+    BusinessProfileVisit,
+    BusinessRepost,
+    BusinessShare,
+    EventRepost,
+    EventShare,
+)
+from business.models import Business
+from insights.rollups import ROLLUP_MODELS, refresh_rollups
+from moments.models import EventMoment
+from services.redis import get_redis
+from users.models import User
+
+"""
+    Insights are recorded off the request path: views append events to a redis
+    list and a worker flushes them in bulk. Repeated events collapse, and the
+    (user, target, day) constraint drops the ones already stored.
+"""
+
+INSIGHTS_BUFFER_KEY = "insights:buffer"
+
+INSIGHTS_FLUSH_SIZE = 5000
+
+BUFFERED_MODELS = {
+    model.__name__: model
+    for model in (
+        BusinessProfileVisit,
+        BusinessLike,
+        BusinessRepost,
+        BusinessShare,
+        EventRepost,
+        EventShare,
+    )
+}
+
+
+class InsightOperations:
+    ADD = "add"
+    REMOVE = "remove"
+
+
+def get_target_field(model):
+    return "event" if model in (EventRepost, EventShare) else "business"
+
+
+def buffer_insight(model, user, target, operation=InsightOperations.ADD):
+    event = {
+        "model": model.__name__,
+        "operation": operation,
+        "user": user.id,
+        "target": target.id,
+        "day": timezone.now().date().isoformat(),
+    }
+
+    get_redis().rpush(INSIGHTS_BUFFER_KEY, json.dumps(event))
+
+
+# Takes the oldest events out of the buffer in a single transaction
+def pop_buffered_insights(count):
+    pipeline = get_redis().pipeline()
+    pipeline.lrange(INSIGHTS_BUFFER_KEY, 0, count - 1)
+    pipeline.ltrim(INSIGHTS_BUFFER_KEY, count, -1)
+
+    events, _ = pipeline.execute()
+
+    return events
+
+
+# Failed events go back to the head of the buffer, in their order
+def restore_buffered_insights(events):
+    get_redis().lpush(INSIGHTS_BUFFER_KEY, *reversed(events))
+
+
+# Returns {(model, user, target): {"remove": bool, "days": set}}, later events win
+def collapse_insights(events):
+    states = defaultdict(lambda: {"remove": False, "days": set()})
+
+    for event in map(json.loads, events):
+        model = BUFFERED_MODELS.get(event.get("model"))
+
+        if model is None:
+            continue
+
+        state = states[(model, event["user"], event["target"])]
+
+        if event["operation"] == InsightOperations.REMOVE:
+            state["remove"] = True
+            state["days"].clear()
+        else:
+            state["days"].add(date.fromisoformat(event["day"]))
+
+    return states
+
+
+def get_existing_ids(model, ids):
+    return set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+
+
+# Users and targets deleted since the events were buffered are dropped, their rows
+# would fail the foreign key checks and hold the whole batch in the buffer
+def drop_deleted_insights(states):
+    targets = {"business": set(), "event": set()}
+    users = set()
+
+    for model, user_id, target_id in states:
+        targets[get_target_field(model)].add(target_id)
+        users.add(user_id)
+
+    existing_users = get_existing_ids(User, users)
+
+    existing_targets = {
+        "business": get_existing_ids(Business, targets["business"]),
+        "event": get_existing_ids(EventMoment, targets["event"]),
+    }
+
+    return {
+        key: state
+        for key, state in states.items()
+        if key[1] in existing_users
+        and key[2] in existing_targets[get_target_field(key[0])]
+    }
+
+
+def save_insights(states):
+    states = drop_deleted_insights(states)
+
+    rollup_keys = set()
+    insights = defaultdict(list)
+
+    for (model, user_id, target_id), state in states.items():
+        field = get_target_field(model)
+        lookups = {"user_id": user_id, f"{field}_id": target_id}
+
+        if state["remove"]:
+            removed = model.objects.filter(**lookups)
+
+            if model in ROLLUP_MODELS:
+                for day in removed.values_list("day", flat=True):
+                    rollup_keys.add((target_id, day, model.metric))
+
+            removed.delete()
+
+        for day in state["days"]:
+            insights[model].append(model(day=day, **lookups))
+
+            if model in ROLLUP_MODELS:
+                rollup_keys.add((target_id, day, model.metric))
+
+    for model, objs in insights.items():
+        model.objects.bulk_create(objs, ignore_conflicts=True)
+
+    refresh_rollups(rollup_keys)
+
+
+def flush_insights(count=INSIGHTS_FLUSH_SIZE):
+    events = pop_buffered_insights(count)
+
+    if len(events) == 0:
+        return 0
+
+    try:
+        with transaction.atomic():
+            save_insights(collapse_insights(events))
+    except Exception:
+        restore_buffered_insights(events)
+        raise
+
+    return len(events)
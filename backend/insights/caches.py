@@ -0,0 +1,31 @@
+import time
+
+from django.core.cache import cache
+
+# Rankings depend on other businesses too, so cached results expire anyway
+INSIGHTS_CACHE_TIMEOUT = 10 * 60
+
+
+def get_insights_version_key(business_id):
+    return f"insights:version:{business_id}"
+
+
+def get_insights_cache_key(name, business_id, *params):
+    version = cache.get(get_insights_version_key(business_id), 0)
+    params = ":".join(str(param) for param in params)
+
+    return f"insights:{name}:{business_id}:{version}:{params}"
+
+
+def get_or_create_insights(name, business_id, params, create):
+    key = get_insights_cache_key(name, business_id, *params)
+    return cache.get_or_set(key, create, timeout=INSIGHTS_CACHE_TIMEOUT)
+
+
+# New insights of a business skip every result cached before them
+def invalidate_insights_cache(*business_ids):
+    version = time.time_ns()
+
+    cache.set_many(
+        {get_insights_version_key(id): version for id in business_ids}, timeout=None
+    )
@@ -4,3 +4,10 @@ from django.db import models
 class RepostAndShareChoices(models.TextChoices):
     MOMENT = "MOMENT", "moment"
     BUSINESS = "BUSINESS", "business"
+
+
+class InsightMetrics(models.TextChoices):
+    REPOSTS = "reposts", "reposts"
+    SHARES = "shares", "shares"
+    LIKES = "likes", "likes"
+    VISITS = "visits", "visits"
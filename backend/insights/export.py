@@ -0,0 +1,95 @@
+import csv
+import json
+import tempfile
+
+from insights.rollups import ROLLUP_MODELS
+
+"""
+    Exports hold the raw insights of a business, read with server side cursors
+    and written in chunks of lines to a temporary file, so memory doesn't grow
+    with the number of rows.
+
+    The file is written by the view, in its worker thread. Under ASGI, Django 4.1
+    iterates streaming responses inside the event loop, where the ORM can't run,
+    so the response only reads the finished file.
+"""
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = ("type", "created_at", "day", "user")
+
+
+class ExportFormats:
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+    content_types = {CSV: "text/csv", NDJSON: "application/x-ndjson"}
+
+
+def get_export_rows(business, from_date, to_date, metrics=None):
+    for model in ROLLUP_MODELS:
+        if metrics and model.metric not in metrics:
+            continue
+
+        insights = (
+            model.objects.filter(business=business, day__gte=from_date, day__lt=to_date)
+            .order_by("day", "id")
+            .values_list("created_at", "day", "user__uuid")
+        )
+
+        for created_at, day, user in insights.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            created_at = created_at.isoformat() if created_at else None
+            yield (str(model.metric), created_at, day.isoformat(), user)
+
+
+# The csv writer only needs an object with write, which hands back the line
+class EchoBuffer(object):
+    def write(self, value):
+        return value
+
+
+def get_csv_lines(rows):
+    writer = csv.writer(EchoBuffer())
+
+    yield writer.writerow(EXPORT_FIELDS)
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def get_ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+def get_chunks(lines, size=EXPORT_CHUNK_SIZE):
+    chunk = []
+
+    for line in lines:
+        chunk.append(line)
+
+        if len(chunk) == size:
+            yield "".join(chunk)
+            chunk = []
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def write_export(business, from_date, to_date, format, metrics=None):
+    rows = get_export_rows(business, from_date, to_date, metrics)
+
+    if format == ExportFormats.NDJSON:
+        lines = get_ndjson_lines(rows)
+    else:
+        lines = get_csv_lines(rows)
+
+    # Removed from disk when the response closes it
+    file = tempfile.TemporaryFile()
+
+    for chunk in get_chunks(lines):
+        file.write(chunk.encode())
+
+    file.seek(0)
+
+    return file
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from insights.backfill import backfill_insight_days
+from insights.rollups import rebuild_rollups
+
+"""
+    Runs after migrate. The rollups are rebuilt only when rows got their day,
+    so every recorded insight is counted on the day it happened.
+"""
+
+
+class Command(BaseCommand):
+    help = "Set the day of the insights recorded before the field and rebuild rollups"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = backfill_insight_days()
+
+            if count > 0:
+                rebuild_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {count} insights"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from insights.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily insight rollups from the recorded insights"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rollups"))
@@ -1,7 +1,5 @@
 from django.db import models
-from services.date import today_date, get_today_day
-from django.utils import timezone
-from datetime import datetime, timedelta
+from services.date import get_this_week_range
 
 
 class BusinessInsightsManager(models.Manager):
@@ -10,30 +8,11 @@ class BusinessInsightsManager(models.Manager):
             business=business, created_at__gte=from_date, created_at__lte=to_date
         )
 
-    def create(self, user, business):
-        today = get_today_day()
-
-        insights = self.get_queryset().filter(
-            created_at__day=today, user=user, business=business
-        )
-
-        if not insights.exists():
-            return super().create(user=user, business=business)
-
-        return None
-
     def get_count(self, business, from_date, to_date):
         return self.get_between(business, from_date, to_date).count()
 
     def get_this_week_count(self, business):
-        today = today_date()
-        from_date = today - timedelta(days=today.weekday())
-        to_date = from_date + timedelta(days=6)
-
-        from_date = timezone.make_aware(
-            datetime.combine(from_date, datetime.min.time())
-        )
-        to_date = timezone.make_aware(datetime.combine(to_date, datetime.max.time()))
+        from_date, to_date = get_this_week_range()
 
         return self.get_between(business, from_date, to_date).count()
 
@@ -44,17 +23,5 @@ class EventInsightManager(models.Manager):
             event=event, created_at__gte=from_date, created_at__lte=to_date
         )
 
-    def create(self, user, event):
-        today = get_today_day()
-
-        insights = self.get_queryset().filter(
-            created_at__day=today, user=user, event=event
-        )
-
-        if not insights.exists():
-            return super().create(user=user, event=event)
-
-        return None
-
     def get_count(self, event, from_date, to_date):
         return self.get_between(event, from_date, to_date).count()
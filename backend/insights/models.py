@@ -1,14 +1,42 @@
 from django.db import models
 from django.db.models import CASCADE
+from django.utils import timezone
 
 from core.models import TimestampModel, DateOnlyModel
+from insights.choices import InsightMetrics
 from insights.managers import EventInsightManager, BusinessInsightsManager
 
 UNIQUE_USER_AND_BUSINESS = ("user", "business")
-UNIQUE_USER_BUSINESS_AND_DATE = ("user", "business", "created_at")
+UNIQUE_USER_BUSINESS_AND_DATE = ("user", "business", "day")
 
 
-class AbstractBusinessInsight(DateOnlyModel):
+def get_today():
+    return timezone.now().date()
+
+
+"""
+    The day has no default: adding the field would write the default into every
+    recorded insight. Rows recorded before the field stay null until
+    backfill_insight_days fills them from created_at, new ones get today on save,
+    or their buffered day when flushed.
+"""
+
+
+class AbstractInsightDay(DateOnlyModel):
+    # A user counts once a day for each insight
+    day = models.DateField(null=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.day is None:
+            self.day = get_today()
+
+        super().save(*args, **kwargs)
+
+
+class AbstractBusinessInsight(AbstractInsightDay):
     user = models.ForeignKey("users.User", on_delete=CASCADE, db_index=False,
                              related_name="user_%(class)s")
 
@@ -19,8 +47,11 @@ class AbstractBusinessInsight(DateOnlyModel):
 
     class Meta:
         abstract = True
-        unique_together = ("user", "business", "created_at")
-        indexes = [models.Index(fields=["business", "created_at"])]
+        unique_together = UNIQUE_USER_BUSINESS_AND_DATE
+        indexes = [
+            models.Index(fields=["business", "created_at"]),
+            models.Index(fields=["business", "day"]),
+        ]
 
 
 '''
@@ -29,7 +60,7 @@ class AbstractBusinessInsight(DateOnlyModel):
 
 
 class BusinessProfileVisit(AbstractBusinessInsight):
-    pass
+    metric = InsightMetrics.VISITS
 
 
 '''
@@ -38,7 +69,7 @@ class BusinessProfileVisit(AbstractBusinessInsight):
 
 
 class BusinessLike(AbstractBusinessInsight):
-    pass
+    metric = InsightMetrics.LIKES
 
 
 '''
@@ -47,7 +78,7 @@ class BusinessLike(AbstractBusinessInsight):
 
 
 class BusinessRepost(AbstractBusinessInsight):
-    pass
+    metric = InsightMetrics.REPOSTS
 
 
 '''
@@ -56,10 +87,28 @@ class BusinessRepost(AbstractBusinessInsight):
 
 
 class BusinessShare(AbstractBusinessInsight):
-    pass
+    metric = InsightMetrics.SHARES
+
+
+'''
+    DAILY ROLLUPS
+'''
+
+
+# Number of insights of a metric a business got in a day, kept in sync with the rows above
+class BusinessInsightDaily(models.Model):
+    business = models.ForeignKey("business.Business", on_delete=CASCADE, db_index=False,
+                                 related_name="insight_days")
+
+    day = models.DateField()
+    metric = models.CharField(max_length=16, choices=InsightMetrics.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("business", "metric", "day")
 
 
-class AbstractEventInsight(DateOnlyModel):
+class AbstractEventInsight(AbstractInsightDay):
     user = models.ForeignKey("users.User", on_delete=CASCADE, db_index=False,
                              related_name="%(app_label)s_%(class)s_user")
 
@@ -70,7 +119,7 @@ class AbstractEventInsight(DateOnlyModel):
 
     class Meta:
         abstract = True
-        unique_together = ("user", "event", "created_at")
+        unique_together = ("user", "event", "day")
         indexes = [models.Index(fields=["event", "created_at"])]
 
 
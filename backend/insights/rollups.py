@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+from django.db.models import Count
+
+from insights.caches import invalidate_insights_cache
+from insights.models import (
+    BusinessInsightDaily,
+    BusinessLike,
+    BusinessProfileVisit,
+    BusinessRepost,
+    BusinessShare,
+)
+
+ROLLUP_MODELS = (BusinessRepost, BusinessShare, BusinessLike, BusinessProfileVisit)
+
+"""
+    Insight charts read one row per business, metric and day instead of every
+    interaction. Ranges include from_date and exclude to_date, as the charts do.
+"""
+
+
+# Recounts the rollups of the given (business id, day, metric) keys from the insights
+def refresh_rollups(keys):
+    keys_by_metric = defaultdict(set)
+
+    for business_id, day, metric in keys:
+        keys_by_metric[metric].add((business_id, day))
+
+    rollups = []
+
+    for model in ROLLUP_MODELS:
+        metric_keys = keys_by_metric.get(model.metric)
+
+        if not metric_keys:
+            continue
+
+        counts = {key: 0 for key in metric_keys}
+
+        days = (
+            model.objects.filter(
+                business__in={business_id for business_id, _ in metric_keys},
+                day__in={day for _, day in metric_keys},
+            )
+            .order_by()
+            .values("business", "day")
+            .annotate(count=Count("pk"))
+            .values_list("business", "day", "count")
+        )
+
+        for business_id, day, count in days:
+            if (business_id, day) in counts:
+                counts[(business_id, day)] = count
+
+        rollups += [
+            BusinessInsightDaily(
+                business_id=business_id, day=day, metric=model.metric, count=count
+            )
+            for (business_id, day), count in counts.items()
+        ]
+
+    BusinessInsightDaily.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=["business", "metric", "day"],
+        update_fields=["count"],
+    )
+
+    invalidate_insights_cache(*{business_id for business_id, _, _ in keys})
+
+
+def rebuild_rollups(chunk_size=1000):
+    BusinessInsightDaily.objects.all().delete()
+
+    total = 0
+
+    for model in ROLLUP_MODELS:
+        # Rows without a day are counted once backfill_insight_days fills them
+        days = (
+            model.objects.filter(day__isnull=False)
+            .order_by()
+            .values("business", "day")
+            .annotate(count=Count("pk"))
+            .values_list("business", "day", "count")
+        )
+
+        rollups = (
+            BusinessInsightDaily(
+                business_id=business_id, day=day, metric=model.metric, count=count
+            )
+            for business_id, day, count in days.iterator(chunk_size=chunk_size)
+        )
+
+        total += len(
+            BusinessInsightDaily.objects.bulk_create(rollups, batch_size=chunk_size)
+        )
+
+    return total
@@ -13,16 +13,18 @@ class OverviewInsight(object):
 
 
 class RepostAndShareInsights(object):
-    def __init__(self, values, business_count, event_count):
+    def __init__(self, values, business_count, event_count, previous_values):
         self.values = values
         self.business_count = business_count
         self.event_count = event_count
+        self.previous_values = previous_values
 
 
 class LikeInsights(object):
-    def __init__(self, values, users_count):
+    def __init__(self, values, users_count, previous_values):
         self.values = values
         self.users_count = users_count
+        self.previous_values = previous_values
 
 
 class SummaryInsights(object):
@@ -36,10 +38,7 @@ class SummaryInsights(object):
 class EventMomentInsightSerializer(serializers.Serializer):
     reposts_count = serializers.IntegerField()
     shares_count = serializers.IntegerField()
-    participants_count = serializers.SerializerMethodField()
-
-    def get_participants_count(self, moment):
-        return moment.participants.count()
+    participants_count = serializers.IntegerField()
 
 
 class OverviewInsightsSerializer(serializers.Serializer):
@@ -54,12 +53,14 @@ class OverviewInsightsSerializer(serializers.Serializer):
 
 class RepostAndShareInsightsSerializer(serializers.Serializer):
     values = serializers.ListField(child=serializers.FloatField())
+    previous_values = serializers.ListField(child=serializers.FloatField())
     business_count = serializers.IntegerField()
     event_count = serializers.IntegerField()
 
 
 class LikeInsightsSerializer(serializers.Serializer):
     values = serializers.ListField(child=serializers.FloatField())
+    previous_values = serializers.ListField(child=serializers.FloatField())
     users_count = serializers.IntegerField()
 
 
@@ -0,0 +1,100 @@
+from datetime import datetime, time, timezone
+
+from django.db import connection
+
+from insights.models import BusinessInsightDaily
+from insights.rollups import ROLLUP_MODELS
+
+"""
+    Insight charts are bucketed and gap filled by postgres: date_trunc groups the
+    insights and generate_series adds the empty buckets, so only the dense
+    vectors leave the database. Day and week buckets sum the daily rollups,
+    hour buckets count the insights themselves.
+"""
+
+
+class Granularities:
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+    values = (HOUR, DAY, WEEK)
+
+
+def get_timestamp(date):
+    return datetime.combine(date, time.min, tzinfo=timezone.utc)
+
+
+def get_hourly_counts_sql(metrics):
+    selects = []
+
+    for model in ROLLUP_MODELS:
+        if model.metric not in metrics:
+            continue
+
+        selects.append(f"""
+            SELECT '{model.metric}' AS metric,
+                date_trunc('hour', created_at AT TIME ZONE 'UTC') AS bucket,
+                COUNT(*) AS count
+            FROM {model._meta.db_table}
+            WHERE business_id = %(business)s
+                AND created_at >= %(from_timestamp)s AND created_at < %(to_timestamp)s
+            GROUP BY bucket
+            """)
+
+    return " UNION ALL ".join(selects)
+
+
+def get_rollup_counts_sql():
+    return f"""
+        SELECT metric, date_trunc(%(granularity)s, day) AS bucket, SUM(count) AS count
+        FROM {BusinessInsightDaily._meta.db_table}
+        WHERE business_id = %(business)s AND metric = ANY(%(metrics)s)
+            AND day >= %(from_date)s AND day < %(to_date)s
+        GROUP BY metric, bucket
+    """
+
+
+# Returns {metric: [count of each bucket]} for the range, from_date included
+def get_series(business, metrics, from_date, to_date, granularity=Granularities.DAY):
+    metrics = [str(metric) for metric in metrics]
+
+    if granularity == Granularities.HOUR:
+        counts_sql = get_hourly_counts_sql(metrics)
+    else:
+        counts_sql = get_rollup_counts_sql()
+
+    sql = f"""
+        WITH counts AS ({counts_sql})
+        SELECT metrics.metric, COALESCE(counts.count, 0)
+        FROM generate_series(
+            date_trunc(%(granularity)s, %(from_date)s::timestamp),
+            %(to_date)s::timestamp - interval '1 microsecond',
+            %(step)s::interval
+        ) AS series(bucket)
+        CROSS JOIN unnest(%(metrics)s::text[]) AS metrics(metric)
+        LEFT JOIN counts
+            ON counts.bucket = series.bucket AND counts.metric = metrics.metric
+        ORDER BY metrics.metric, series.bucket
+    """
+
+    params = {
+        "business": business.id,
+        "metrics": metrics,
+        "granularity": granularity,
+        "step": f"1 {granularity}",
+        "from_date": from_date,
+        "to_date": to_date,
+        "from_timestamp": get_timestamp(from_date),
+        "to_timestamp": get_timestamp(to_date),
+    }
+
+    series = {metric: [] for metric in metrics}
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+        for metric, count in cursor.fetchall():
+            series[metric].append(int(count))
+
+    return series
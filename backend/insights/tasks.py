@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from insights.buffer import flush_insights as flush_buffered_insights
+
+
+@shared_task
+def flush_insights():
+    return flush_buffered_insights()
@@ -1,12 +1,17 @@
 from datetime import timedelta, datetime
-from functools import reduce
-from itertools import groupby
 
-import numpy
+from django.db import connection
+from django.db.models.query_utils import Q
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When, Window
+from django.db.models.functions import Coalesce, RowNumber
 
 from business.models import Business
+from insights.buffer import InsightOperations, buffer_insight
+from insights.caches import get_or_create_insights
+from insights.choices import InsightMetrics
 from insights.models import BusinessProfileVisit, BusinessLike, EventShare, EventRepost, \
-    BusinessShare, BusinessRepost
+    BusinessShare, BusinessRepost, BusinessInsightDaily
+from insights.series import Granularities, get_series
 from insights.serializers import OverviewInsight, LikeInsights, SummaryInsights, \
     RepostAndShareInsights
 from moments.models import EventMoment
@@ -45,58 +50,27 @@ def parse_dates(s_from_date, s_to_date):
 
         return from_date, to_date, delta_days
 
-    except ValueError:
+    except (ValueError, TypeError):
         return None, None, None
 
 
-def created_at_key(moment):
-    return moment.get("created_at").strftime("%Y-%m-%d")
-
-
-def group_by_date(items):
-    result = {}
-
-    for key, group in groupby(items, created_at_key):
-        if result.get(key) is None:
-            result[key] = list(group)
-        else:
-            result[key] += list(group)
-
-    return result
-
-
-def group_values(items, from_date, delta_days):
-    result = group_by_date(items)
-
-    values = [0] * delta_days
-
-    for index in range(0, delta_days):
-        date = from_date + timedelta(index)
-        key_date = date.strftime("%Y-%m-%d")
-
-        items = result.get(key_date)
-
-        if items is not None:
-            values[index] = len(items)
-
-    return values
-
-
 '''
     EVENT
+
+    Insights are buffered and saved in bulk by the flush_insights task
 '''
 
 
 def add_share_to_event(user: User, event: EventMoment):
     event.add_share()
 
-    EventShare.objects.create(user, event)
+    buffer_insight(EventShare, user, event)
 
 
 def add_repost_to_event(user: User, event: EventMoment):
     event.add_repost()
 
-    EventRepost.objects.create(user, event)
+    buffer_insight(EventRepost, user, event)
 
 
 '''
@@ -105,54 +79,56 @@ def add_repost_to_event(user: User, event: EventMoment):
 
 
 def add_share_to_business(user: User, business: Business):
-    BusinessShare.objects.create(user, business)
+    buffer_insight(BusinessShare, user, business)
 
 
 def add_repost_to_business(user: User, business: Business):
     business.add_repost()
     
-    BusinessRepost.objects.create(user, business)
+    buffer_insight(BusinessRepost, user, business)
 
 
 def add_business_profile_visits(user: User, business: Business):
-    BusinessProfileVisit.objects.create(user, business)
+    buffer_insight(BusinessProfileVisit, user, business)
 
 
 def add_business_like(user: User, business: Business):
-    BusinessLike.objects.create(user, business)
+    buffer_insight(BusinessLike, user, business)
 
 
 def remove_business_like(user: User, business: Business):
-    BusinessLike.objects.filter(user=user, business=business).delete()
+    buffer_insight(BusinessLike, user, business, InsightOperations.REMOVE)
 
 
-def create_reposts_or_shares_insight(mode, business, s_from_date, s_to_date):
-    from_date, to_date, delta_days = parse_dates(s_from_date, s_to_date)
+def get_granularity(granularity):
+    return granularity if granularity in Granularities.values else Granularities.DAY
 
-    if from_date is None:
-        return None
 
-    date_bounds = (from_date, to_date)
+# Series of the metrics in the range and in the same length of time right before it
+def get_series_with_previous(business, metrics, from_date, to_date, granularity):
+    granularity = get_granularity(granularity)
 
-    business_model = BusinessRepost
-    event_model = EventRepost
+    prev_from_date = from_date - (to_date - from_date)
 
-    if mode == "share":
-        business_model = BusinessShare
-        event_model = EventShare
+    series = get_series(business, metrics, from_date, to_date, granularity)
+    prev_series = get_series(business, metrics, prev_from_date, from_date, granularity)
 
-    business_reposts = business_model.objects.get_between(business, *date_bounds).values(
-        "created_at")
-    # event_reposts = event_model.objects.get_between(event, *date_bounds).values("created_at")
-    #
-    # items = business_reposts.union(event_reposts)
+    return series, prev_series
 
-    values = group_values(business_reposts, from_date, delta_days)
 
-    business_reposts_count = business_reposts.count()
-    # event_reposts_count = event_reposts.count()
+def create_reposts_or_shares_insight(mode, business, s_from_date, s_to_date, granularity=None):
+    from_date, to_date, delta_days = parse_dates(s_from_date, s_to_date)
 
-    return RepostAndShareInsights(values, business_reposts_count, 0)
+    if from_date is None:
+        return None
+
+    metric = InsightMetrics.SHARES if mode == "share" else InsightMetrics.REPOSTS
+
+    series, prev_series = get_series_with_previous(business, [metric], from_date, to_date,
+                                                   granularity)
+    values = series[metric]
+
+    return RepostAndShareInsights(values, sum(values), 0, prev_series[metric])
 
 
 def create_reposts_insight(*args):
@@ -163,200 +139,149 @@ def create_shares_insight(*args):
     return create_reposts_or_shares_insight("share", *args)
 
 
-def create_profile_visit_insight(business, s_from_date, s_to_date):
+def create_profile_visit_insight(business, s_from_date, s_to_date, granularity=None):
     from_date, to_date, delta_days = parse_dates(s_from_date, s_to_date)
 
-    visits = BusinessProfileVisit.objects.filter(business=business, created_at__gte=from_date,
-                                                 created_at__lte=to_date).values("created_at")
-
-    grouped_queryset = group_by_date(visits)
-    insights = [0] * delta_days
+    metric = InsightMetrics.VISITS
 
-    for index in range(0, delta_days):
-        date = from_date + timedelta(index)
-        key_date = date.strftime("%Y-%m-%d")
+    series, prev_series = get_series_with_previous(business, [metric], from_date, to_date,
+                                                   granularity)
 
-        visits = grouped_queryset.get(key_date)
+    return {"values": series[metric], "previous_values": prev_series[metric]}
 
-        if visits is not None:
-            insights[index] = len(visits)
 
-    return {"values": insights}
-
-
-def create_likes_insight(business, s_from_date, s_to_date):
+def create_likes_insight(business, s_from_date, s_to_date, granularity=None):
     from_date, to_date, delta_days = parse_dates(s_from_date, s_to_date)
 
-    likes = BusinessLike.objects.filter(business=business, created_at__gte=from_date,
-                                        created_at__lte=to_date).values("created_at")
-
-    users_count = BusinessLike.objects.get_between(business, from_date, to_date).count()
-
-    grouped_queryset = group_by_date(likes)
-    values = [0] * delta_days
+    metric = InsightMetrics.LIKES
 
-    for index in range(0, delta_days):
-        date = from_date + timedelta(index)
-        key_date = date.strftime("%Y-%m-%d")
+    series, prev_series = get_series_with_previous(business, [metric], from_date, to_date,
+                                                   granularity)
+    values = series[metric]
 
-        likes = grouped_queryset.get(key_date)
+    return LikeInsights(values, sum(values), prev_series[metric])
 
-        if likes is not None:
-            values[index] = len(likes)
 
-    return LikeInsights(values, users_count)
+def get_delta(count, prev_count):
+    return ((count - prev_count) / max(1, prev_count)) * 100
 
 
-def get_total_reposts_count(*args):
-    business_reposts = BusinessRepost.objects.get_between(*args).values("id").count()
-    return business_reposts
-    # event_reposts = EventRepost.objects.get_between(*args).values("id")
-    # return business_reposts.union(event_reposts)
+# Totals of every metric in both periods, with a single conditional aggregation
+def get_period_totals(business, from_date, to_date, prev_from_date, prev_to_date):
+    period = Q(day__gte=from_date, day__lt=to_date)
+    prev_period = Q(day__gte=prev_from_date, day__lt=prev_to_date)
 
+    aggregates = {}
 
-def get_total_shares_count(*args):
-    business_shares = BusinessShare.objects.get_between(*args).values("id").count()
-    return business_shares
-    # event_shares = EventShare.objects.get_between(*args).values("id")
-    # return business_shares.union(event_shares)
+    for metric in InsightMetrics.values:
+        aggregates[metric] = Sum("count", filter=period & Q(metric=metric), default=0)
+        aggregates[f"prev_{metric}"] = Sum("count", filter=prev_period & Q(metric=metric),
+                                           default=0)
 
+    rollups = BusinessInsightDaily.objects.filter(business=business)
 
-def get_total_likes_count(*args):
-    return BusinessLike.objects.get_between(*args).count()
+    return rollups.filter(period | prev_period).aggregate(**aggregates)
 
 
 # Reposts -- Shares -- Likes -- Visits
 def create_insights_overview(business, params):
-    from_date = params.get("from")
-    to_date = params.get("to")
-
-    prev_from_date = params.get("prev_from")
-    prev_to_date = params.get("prev_to")
-
-    if None in [from_date, to_date, prev_from_date, prev_to_date]:
-        return None
-
-    overall_rank, category_rank = 0, 0
-
-    # If the business is of type VENUE
-    if business.location is not None:
-        overall_rank = get_business_rank(business, from_date)
-        category_rank = get_business_rank(business, from_date, True)
-
-    # Reposts
-
-    first_query_params = (business, from_date, to_date)
-    second_query_params = (business, prev_from_date, prev_to_date)
-
-    reposts_count = get_total_reposts_count(*first_query_params)
-    prev_reposts_count = get_total_reposts_count(*second_query_params)
-
-    delta_reposts = ((reposts_count - prev_reposts_count) / max(1, prev_reposts_count)) * 100
+    from_date = parse_date(params.get("from") or "")
+    to_date = parse_date(params.get("to") or "")
 
-    # Shares
+    prev_from_date = parse_date(params.get("prev_from") or "")
+    prev_to_date = parse_date(params.get("prev_to") or "")
 
-    shares_count = get_total_shares_count(*first_query_params)
-    prev_shares_count = get_total_shares_count(*second_query_params)
+    dates = (from_date, to_date, prev_from_date, prev_to_date)
 
-    delta_shares = ((shares_count - prev_shares_count) / max(1, prev_shares_count)) * 100
-
-    # Likes
-
-    likes = get_total_likes_count(*first_query_params)
-    prev_likes = get_total_likes_count(*second_query_params)
-
-    delta_likes = ((likes - prev_likes) / max(1, prev_likes)) * 100
-
-    # Profile visits
-
-    profile_queryset = BusinessProfileVisit.objects
-
-    visits = profile_queryset.get_count(*first_query_params)
-    prev_visits = profile_queryset.get_count(*second_query_params)
-
-    delta_visits = ((visits - prev_visits) / max(1, prev_visits)) * 100
+    if None in dates:
+        return None
 
-    return OverviewInsight(overall_rank, category_rank, delta_reposts, delta_shares, delta_likes,
-                           delta_visits)
+    def create():
+        overall_rank, category_rank = 0, 0
 
+        # If the business is of type VENUE
+        if business.location is not None:
+            overall_rank, category_rank = get_business_ranks(business, from_date)
 
-def get_insight_values(*args):
-    reposts = create_reposts_insight(*args).values
-    shares = create_shares_insight(*args).values
-    likes = create_likes_insight(*args).values
+        totals = get_period_totals(business, *dates)
 
-    return reposts, shares, likes
+        deltas = [
+            get_delta(totals[metric], totals[f"prev_{metric}"])
+            for metric in (InsightMetrics.REPOSTS, InsightMetrics.SHARES,
+                           InsightMetrics.LIKES, InsightMetrics.VISITS)
+        ]
 
+        return OverviewInsight(overall_rank, category_rank, *deltas)
 
-def get_total_interactions(business, from_date, to_date, reduced=False):
-    params = (business, from_date, to_date)
+    return get_or_create_insights("overview", business.id, dates, create)
 
-    reposts, shares, likes = get_insight_values(*params)
 
-    interactions = [reposts, shares, likes]
-    total_interactions = list(numpy.sum(interactions, axis=0))
+# Weighted interactions of the business in the range, read from the daily rollups
+def get_rank_value(from_date, to_date):
+    weight = Case(When(metric__in=[InsightMetrics.REPOSTS, InsightMetrics.SHARES], then=2),
+                  default=1)
 
-    if reduced:
-        summed_interactions = reduce(lambda x, y: x + y, total_interactions)
-        # Number type
-        return summed_interactions
+    rollups = BusinessInsightDaily.objects.filter(
+        business=OuterRef("pk"), day__gte=from_date, day__lt=to_date,
+        metric__in=[InsightMetrics.REPOSTS, InsightMetrics.SHARES, InsightMetrics.LIKES]
+    )
+    rollups = rollups.order_by().values("business").annotate(value=Sum(F("count") * weight))
 
-    # list type
-    return total_interactions
+    return Coalesce(Subquery(rollups.values("value")), 0)
 
 
-def rank_value_key(item):
-    return item.get("rank_value")
+def get_rank_position(partition_by=None):
+    return Window(RowNumber(), partition_by=partition_by,
+                  order_by=[F("rank_value").desc(), F("id").asc()])
 
 
-# Get business ranking in the last 7 days, following the hierarchy:
-# 1. REPOSTS
-# 2. SHARES
-# 3. LIKES
-def get_business_rank(my_business, s_from_date, use_category=False):
-    from_date = parse_date(s_from_date)
+# Get business ranking in the 7 days from the date, in the city and in its category.
+# Every business of the city is scored as 2 * reposts + 2 * shares + likes and ranked
+# in a single query.
+def get_business_ranks(my_business, from_date):
     to_date = from_date + timedelta(days=7)
 
-    businesses = Business.objects.get_by_place_id(my_business.location.place_id)
-    remapped_businesses = []
-
-    if use_category:
-        businesses = businesses.filter(category=my_business.category)
-
-    for business in businesses:
-        params = (business, from_date, to_date)
+    businesses = Business.objects.get_by_place_id(my_business.location.place_id).annotate(
+        rank_value=get_rank_value(from_date, to_date)
+    ).annotate(
+        overall_rank=get_rank_position(),
+        category_rank=get_rank_position(partition_by=[F("category")]),
+    ).values("id", "overall_rank", "category_rank")
 
-        reposts_count, shares_count, likes_count = get_insight_values(*params)
+    # Window functions can't be filtered in the same query, so the ranking is wrapped
+    sql, sql_params = businesses.query.sql_with_params()
 
-        rank_value = 2 * reposts_count + 2 * shares_count + likes_count
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT overall_rank, category_rank FROM ({sql}) ranks WHERE ranks.id = %s",
+            [*sql_params, my_business.id]
+        )
+        ranks = cursor.fetchone()
 
-        remapped_businesses.append({"rank_value": rank_value, "id": business.id})
+    if ranks is None:
+        return None, None
 
-    remapped_businesses.sort(key=rank_value_key, reverse=True)
+    return ranks
 
-    rank_index = None
 
-    for index, business in enumerate(remapped_businesses):
-        if my_business.id == business.get("id"):
-            rank_index = index
+def create_summary_insights(business, s_from_date, s_to_date, granularity=None):
+    from_date, to_date, delta_days = parse_dates(s_from_date, s_to_date)
 
-    if rank_index is None:
+    if from_date is None:
         return None
 
-    return rank_index + 1
-
+    granularity = get_granularity(granularity)
 
-def create_summary_insights(business, from_date, to_date):
-    params = (business, from_date, to_date)
+    def create():
+        metrics = (InsightMetrics.REPOSTS, InsightMetrics.SHARES, InsightMetrics.LIKES)
+        series = get_series(business, metrics, from_date, to_date, granularity)
 
-    reposts_count = get_total_reposts_count(*params)
-    shares_count = get_total_shares_count(*params)
-    likes_count = get_total_likes_count(*params)
+        reposts, shares, likes = [series[metric] for metric in metrics]
 
-    interactions = get_total_interactions(*params)
+        interactions = [sum(values) for values in zip(reposts, shares, likes)]
 
-    summary = SummaryInsights(reposts_count, shares_count, likes_count, interactions)
+        return SummaryInsights(sum(reposts), sum(shares), sum(likes), interactions)
 
-    print(reposts_count, shares_count, likes_count, summary)
+    params = (from_date, to_date, granularity)
 
-    return summary
+    return get_or_create_insights("summary", business.id, params, create)
@@ -1,9 +1,11 @@
+from django.http import FileResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 
 from authentication.decorators import business_authentication
 from authentication.api_views import BusinessAuthenticationAPIView
+from insights.export import ExportFormats, write_export
 from insights.serializers import (
     OverviewInsightsSerializer,
     LikeInsightsSerializer,
@@ -19,6 +21,7 @@ from insights.utils import (
     create_summary_insights,
     create_reposts_insight,
     create_shares_insight,
+    parse_dates,
 )
 from moments.models import EventMoment
 
@@ -48,7 +51,10 @@ def get_insights_detail(request):
     from_date = params.get("from")
     business = request.business
 
-    shared_params = (business, from_date, to_date)
+    # hour, day or week, days by default
+    granularity = params.get("granularity")
+
+    shared_params = (business, from_date, to_date, granularity)
 
     if type == INSIGHT_TYPES.reposts:
         insight = create_reposts_insight(*shared_params)
@@ -79,3 +85,32 @@ def get_insights_overview(request):
     overview = OverviewInsightsSerializer(overview)
 
     return Response(overview.data, status=HTTP_200_OK)
+
+
+# Sends the raw insights of the range as csv or ndjson, ?types=likes,visits filters them
+@api_view(["GET"])
+@business_authentication
+def export_insights(request):
+    params = request.query_params
+
+    from_date, to_date, _ = parse_dates(params.get("from", ""), params.get("to", ""))
+
+    if from_date is None or to_date is None:
+        return Response(status=HTTP_400_BAD_REQUEST)
+
+    format = params.get("format", ExportFormats.CSV)
+
+    if format not in ExportFormats.content_types:
+        return Response(status=HTTP_400_BAD_REQUEST)
+
+    types = params.get("types")
+    metrics = types.split(",") if types else None
+
+    file = write_export(request.business, from_date, to_date, format, metrics)
+
+    return FileResponse(
+        file,
+        as_attachment=True,
+        filename=f"insights_{from_date}_{to_date}.{format}",
+        content_type=ExportFormats.content_types[format],
+    )
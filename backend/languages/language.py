@@ -1,7 +1,20 @@
 import os
 import json
+from functools import lru_cache
+
 from django.conf import settings
 
+LANGUAGES = ("en", "it")
+
+
+# Files are read once per process, they only change with a deploy
+@lru_cache(maxsize=None)
+def load_language(language):
+    file_path = os.path.join(settings.BASE_DIR, "languages", language + ".json")
+
+    with open(file_path) as file:
+        return json.load(file)
+
 
 def get_language_content(instance):
     from users.models import User
@@ -10,19 +23,18 @@ def get_language_content(instance):
     language = "en"
 
     if isinstance(instance, int):
-        user = User.objects.filter(id=instance)
+        user_language = (
+            User.objects.filter(id=instance).values_list("language", flat=True).first()
+        )
 
-        if user.exists():
-            user = user.first()
-            language = user.language
+        if user_language is not None:
+            language = user_language
     elif isinstance(instance, Business):
         language = instance.owner.user.language
     elif hasattr(instance, "language"):
         language = instance.language
 
-    file_path = os.path.join(settings.BASE_DIR, "languages", language + ".json")
-
-    file = open(file_path)
-    data = json.load(file)
+    if language not in LANGUAGES:
+        language = "en"
 
-    return data, language
+    return load_language(language), language
@@ -1,9 +1,8 @@
 from django.contrib import admin
 from django.utils import timezone
 from django.utils.text import Truncator
-from services.date import get_date_tz_aware
-from datetime import datetime, timedelta
 from moments.models import EventMoment, UserMoment
+from moments.utils import get_event_end_at
 
 
 class MomentAdmin(admin.ModelAdmin):
@@ -70,22 +69,10 @@ class EventMomentAdmin(admin.ModelAdmin):
     @admin.action(description="Delete expired events")
     def delete_expired_events(_, __, queryset):
         for event in queryset:
-            date = event.date
+            end_at = get_event_end_at(event)
 
-            if date is None:
-                continue
-
-            start_time = event.time
-            end_time = event.end_time
-
-            if end_time < start_time:
-                date += timedelta(days=1)
-
-            event_datetime_naive = datetime.combine(date, end_time)
-            event_datetime_aware = get_date_tz_aware(event_datetime_naive)
-
-            # Check if event is not periodic and then check if it's expired
-            if event.periodic_day is None and event_datetime_aware < timezone.now():
+            # Periodic events have no end
+            if end_at is not None and end_at < timezone.now():
                 event.delete()
 
     actions = [delete_expired_events]
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+# Moments are only shown once moderated and published
+class MomentStatus(models.TextChoices):
+    PENDING = "pending", "pending"
+    PUBLISHED = "published", "published"
+    REJECTED = "rejected", "rejected"
+
+
+# Day of periodic events, numbered as date.weekday() does, Monday is 0
+class WeekDays(models.IntegerChoices):
+    MONDAY = 0, "monday"
+    TUESDAY = 1, "tuesday"
+    WEDNESDAY = 2, "wednesday"
+    THURSDAY = 3, "thursday"
+    FRIDAY = 4, "friday"
+    SATURDAY = 5, "saturday"
+    SUNDAY = 6, "sunday"
@@ -0,0 +1,83 @@
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+
+from business.models import Business
+from moments.managers import ExpiredMomentQuerySet
+from moments.models import EventMoment, UserMoment
+from moments.utils import get_event_end_at
+from services.expiry import sweep_expired
+from shared.models import Location
+
+"""
+    Expired moments and events are deleted by a periodic sweep instead of a
+    task per object. The sweep runs the cleanup of on_moment_deleted once per
+    batch: the locations are deleted together and reposts subtracted in one update.
+"""
+
+
+def get_repost_counts(moments, field):
+    counts = (
+        moments.filter(**{f"{field}__isnull": False})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("id"))
+        .values_list(field, "count")
+    )
+
+    return dict(counts)
+
+
+def subtract_reposts(model, counts):
+    if not counts:
+        return
+
+    subtracted = Case(*[When(id=id, then=Value(count)) for id, count in counts.items()])
+
+    model.objects.filter(id__in=counts).update(
+        reposts_count=F("reposts_count") - subtracted
+    )
+
+
+def delete_user_moments(ids):
+    moments = UserMoment.objects.filter(id__in=ids)
+
+    location_ids = list(moments.values_list("location", flat=True))
+    business_reposts = get_repost_counts(moments, "business_tag")
+    event_reposts = get_repost_counts(moments, "event")
+
+    ExpiredMomentQuerySet(UserMoment).filter(id__in=ids).delete()
+    Location.objects.filter(id__in=location_ids).delete()
+
+    subtract_reposts(Business, business_reposts)
+    subtract_reposts(EventMoment, event_reposts)
+
+
+def delete_events(ids):
+    EventMoment.objects.filter(id__in=ids).delete()
+
+
+# Events saved before end_at existed get it on the first sweep
+def fill_events_end_at():
+    events = EventMoment.objects.filter(
+        end_at__isnull=True, periodic_day__isnull=True, date__isnull=False
+    )
+
+    events = list(events)
+
+    for event in events:
+        event.end_at = get_event_end_at(event)
+
+    EventMoment.objects.bulk_update(events, ["end_at"], batch_size=500)
+
+
+def sweep_expired_moments():
+    now = timezone.now()
+
+    fill_events_end_at()
+
+    moments = sweep_expired(
+        UserMoment.objects.filter(end_at__lt=now), delete_user_moments
+    )
+    events = sweep_expired(EventMoment.objects.filter(end_at__lt=now), delete_events)
+
+    return moments + events
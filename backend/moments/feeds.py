@@ -0,0 +1,103 @@
+import logging
+import time
+
+from django.contrib.gis.db.models.functions import Distance as GeoDistance
+from django.contrib.gis.measure import Distance as MeasureDistance
+from django.db.models import Exists
+from django.db.models.expressions import OuterRef
+from django.utils import timezone
+
+from core.constants import SEARCH_RADIUS_NOT_IN_CITY
+from core.pagination import paginate
+from core.querylimits import QueryLimits
+from moments.models import UserMoment
+from moments.utils import prefetch_moment_details
+from profiles.utils import get_blocks_between
+
+logger = logging.getLogger(__name__)
+
+# Pages slower than this are logged, to track the feed at peak hours
+FEED_LATENCY_BUDGET = 0.25
+
+"""
+    The moments feed reads the published moments that did not end yet, newest
+    first from the partial feed index or nearest first around a coordinate.
+    Blocks in either direction are one anti join.
+"""
+
+
+class FeedRankings:
+    RECENCY = "recency"
+    DISTANCE = "distance"
+
+    values = (RECENCY, DISTANCE)
+
+
+FEED_ORDERINGS = {
+    FeedRankings.RECENCY: ("-created_at", "-id"),
+    FeedRankings.DISTANCE: ("distance", "-created_at", "-id"),
+}
+
+
+def get_ranking(ranking, coordinate):
+    if ranking not in FeedRankings.values:
+        ranking = FeedRankings.RECENCY
+
+    # Nearest first needs somewhere to measure from
+    if ranking == FeedRankings.DISTANCE and coordinate is None:
+        ranking = FeedRankings.RECENCY
+
+    return ranking
+
+
+def get_active_moments(profile):
+    blocks = get_blocks_between(profile, OuterRef("user"))
+
+    queryset = (
+        UserMoment.objects.get_published()
+        .filter(end_at__gte=timezone.now())
+        .exclude(Exists(blocks))
+    )
+
+    return prefetch_moment_details(queryset, profile)
+
+
+def get_moments_feed(
+    profile, place_id=None, coordinate=None, ranking=None, cursor=None, offset=0
+):
+    started_at = time.perf_counter()
+
+    ranking = get_ranking(ranking, coordinate)
+    queryset = get_active_moments(profile)
+
+    if place_id:
+        queryset = queryset.filter(place_id=place_id)
+
+    if coordinate:
+        queryset = queryset.filter(
+            coordinate__distance_lte=(
+                coordinate,
+                MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
+            )
+        ).annotate(distance=GeoDistance("coordinate", coordinate))
+
+    page = paginate(
+        queryset,
+        FEED_ORDERINGS[ranking],
+        QueryLimits.USER_FEEDS,
+        cursor=cursor,
+        offset=offset,
+    )
+
+    elapsed = time.perf_counter() - started_at
+
+    if elapsed > FEED_LATENCY_BUDGET:
+        logger.warning(
+            "Moments feed took %.3fs (ranking=%s, place_id=%s, coordinate=%s)",
+            elapsed,
+            ranking,
+            place_id,
+            coordinate is not None,
+        )
+
+    return page
@@ -1,12 +1,13 @@
 from django.db.models import FloatField, Case, When
 from django.contrib.gis.db.models.functions import Distance as GeoDistance
-from django.db.models.functions import Coalesce
 from django.contrib.gis.measure import Distance as MeasureDistance
-from django.db.models.query_utils import Q
-from django.utils import timezone
 
 from core.constants import SEARCH_RADIUS_NOT_IN_CITY
-from moments.models import EventMoment, UserMoment
+from core.pagination import get_page_params, paginate
+from core.querylimits import QueryLimits
+from moments.feeds import get_moments_feed
+from moments.models import EventMoment
+from moments.occurrences import get_next_occurrence
 from services.utils import get_point_coordinate
 
 
@@ -19,45 +20,26 @@ def parse_user_data(request):
         coordinate = get_point_coordinate(coordinate)
 
     place_id = data.get("place_id")
-    offset = data.get("offset")
-    up_offset = offset + 8
+    cursor, offset = get_page_params(data)
 
-    return coordinate, place_id, offset, up_offset
+    return coordinate, place_id, cursor, offset
 
 
 def get_user_moments_by(request):
-    coordinate, place_id, offset, up_offset = parse_user_data(request)
-
-    user = request.user
-    now = timezone.now()
-
-    blocked_users = user.profile.blocked_users.all()
-
-    queryset = UserMoment.objects.filter(end_at__gte=now).exclude(
-        Q(user__in=blocked_users)
-    )
-
-    if place_id:
-        queryset = queryset.filter(location__place_id=place_id)
+    coordinate, place_id, cursor, offset = parse_user_data(request)
 
-    if coordinate:
-        queryset = (
-            queryset.filter(
-                location__coordinate__distance_lte=(
-                    coordinate,
-                    MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
-                )
-            )
-            .annotate(distance=GeoDistance("location__coordinate", coordinate))
-            .order_by("distance")
-        )
-
-    queryset = queryset.filter(~Q(user__blocked_users__in=[user.profile])).order_by(
-        "-created_at"
+    data = request.data or request.query_params
+    ranking = data.get("ranking")
+
+    return get_moments_feed(
+        request.user.profile,
+        place_id=place_id,
+        coordinate=coordinate,
+        ranking=ranking,
+        cursor=cursor,
+        offset=offset,
     )
 
-    return queryset[offset:up_offset]
-
 
 # Distances are in meters
 
@@ -66,40 +48,31 @@ def get_event_moments_by(data):
     coordinate = data.get("coordinate")
 
     place_id = data.get("place_id")
+    cursor = data.get("cursor")
     offset = data.get("offset")
-    up_offset = offset + 8
 
-    queryset = EventMoment.objects.get_approved()
+    next_date = get_next_occurrence(data.get("from_date"), data.get("to_date"))
+
+    # Dated and periodic events together, by the next date they take place
+    queryset = (
+        EventMoment.objects.get_approved()
+        .select_related("business")
+        .annotate(next_date=next_date)
+        .filter(next_date__isnull=False)
+    )
 
     if place_id:
-        queryset = queryset.filter(
-            Q(business__location__place_id=place_id) | Q(location__place_id=place_id)
-        )
+        queryset = queryset.filter(place_id=place_id)
 
     if coordinate and not place_id:
         queryset = (
             queryset.filter(
-                Q(
-                    Q(
-                        business__location__coordinate__distance_lte=(
-                            coordinate,
-                            MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
-                        )
-                    )
-                    | Q(
-                        location__coordinate__distance_lte=(
-                            coordinate,
-                            MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
-                        )
-                    )
-                )
-            )
-            .annotate(
-                distance=GeoDistance(
-                    Coalesce("business__location__coordinate", "location__coordinate"),
+                coordinate__distance_lte=(
                     coordinate,
+                    MeasureDistance(m=SEARCH_RADIUS_NOT_IN_CITY),
                 )
             )
+            .annotate(distance=GeoDistance("coordinate", coordinate))
             .order_by("distance")
         )
 
@@ -108,18 +81,17 @@ def get_event_moments_by(data):
             distance=Case(
                 When(
                     has_activity=True,
-                    then=GeoDistance(
-                        Coalesce(
-                            "business__location__coordinate", "location__coordinate"
-                        ),
-                        coordinate,
-                    ),
+                    then=GeoDistance("coordinate", coordinate),
                 ),
                 default=None,
                 output_field=FloatField(),
             )
         )
 
-    queryset = queryset.order_by("date")
-
-    return queryset[offset:up_offset]
+    return paginate(
+        queryset,
+        ("next_date", "time", "id"),
+        QueryLimits.EVENT_MOMENTS_LIST,
+        cursor=cursor,
+        offset=offset,
+    )
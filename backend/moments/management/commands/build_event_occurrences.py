@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from moments.occurrences import roll_occurrences
+
+
+class Command(BaseCommand):
+    help = "Schedule the occurrences of the events for the coming weeks"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = roll_occurrences()
+
+        self.stdout.write(self.style.SUCCESS(f"Scheduled {count} occurrences"))
@@ -1,12 +1,21 @@
 from django.db import models
 
+from moments.choices import MomentStatus
 from services.date import date_from
 
 
+# Expired moments deleted by the sweeper, which cleans up after them in batches
+class ExpiredMomentQuerySet(models.QuerySet):
+    pass
+
+
 class UserMomentManager(models.Manager):
+    def get_published(self):
+        return self.get_queryset().filter(status=MomentStatus.PUBLISHED)
+
     # Get all users moments in 24 hours, so only the active ones.
     def get_today_moments(self):
-        return self.get_queryset().filter(created_at__gte=date_from(1))
+        return self.get_published().filter(created_at__gte=date_from(1))
 
     def get_moments_where_im_tagged(self, user):
         return self.get_today_moments().filter(participants__in=[user])
@@ -1,12 +1,14 @@
 import uuid
 
+from django.contrib.gis.db import models as geomodels
 from django.core.validators import URLValidator
 from django.db import models
-from django.db.models import CASCADE
+from django.db.models import CASCADE, F, Q
 
 from core.fields import TextField, ShortUUIDField
 from core.fields import UniqueNameFileField
 from core.models import TimestampModel
+from moments.choices import MomentStatus, WeekDays
 from moments.managers import EventMomentManager, UserMomentManager
 from services.utils import get_abstract_related_name
 
@@ -32,6 +34,10 @@ class UserMoment(TimestampModel):
         "shared.Location", related_name="user_moment_location", on_delete=CASCADE
     )
 
+    # Copied from the location by shared.locations, for single table geo queries
+    coordinate = geomodels.PointField(editable=False, **allow_blank)
+    place_id = models.CharField(max_length=256, blank=True, default="", editable=False)
+
     content = TextField(max_length=300, **allow_blank)
 
     source = UniqueNameFileField(upload_to=user_moment_source_path, blank=True)
@@ -41,11 +47,18 @@ class UserMoment(TimestampModel):
 
     event = models.ForeignKey("moments.EventMoment", on_delete=CASCADE, **allow_blank)
 
-    end_at = models.DateTimeField(default=None)
+    end_at = models.DateTimeField(default=None, db_index=True)
+
+    # Published by default so the moments saved before moderation stay visible,
+    # uploads are created pending, see CreateUserMomentSerializer
+    status = models.CharField(
+        max_length=16, choices=MomentStatus.choices, default=MomentStatus.PUBLISHED
+    )
 
     participants = models.ManyToManyField(
         "profiles.UserProfile", related_name="participants", **many_to_many_params
     )
+    participants_count = models.IntegerField(default=0, editable=False)
 
     replied_by = models.ManyToManyField(
         "profiles.UserProfile", related_name="replied_by", **many_to_many_params
@@ -71,6 +84,22 @@ class UserMoment(TimestampModel):
 
     objects = UserMomentManager()
 
+    class Meta(TimestampModel.Meta):
+        indexes = [
+            # Feed pages of the published moments, newest first
+            models.Index(
+                F("created_at").desc(),
+                F("id").desc(),
+                condition=Q(status=MomentStatus.PUBLISHED),
+                name="%(app_label)s_feed_part_ix",
+            ),
+            models.Index(
+                fields=["place_id"],
+                condition=~Q(place_id=""),
+                name="%(app_label)s_%(class)s_place_ix",
+            ),
+        ]
+
     @property
     def source_url(self):
         if self.source:
@@ -106,12 +135,18 @@ class EventMoment(TimestampModel):
     time = models.TimeField(default=None)
     end_time = models.TimeField(default=None)
 
-    # Ex. every Monday event
-    periodic_day = models.IntegerField(default=None, **allow_blank)
+    # Ex. every Monday event, from 0 for Monday to 6 for Sunday
+    periodic_day = models.IntegerField(
+        default=None, choices=WeekDays.choices, **allow_blank
+    )
+
+    # Set on save from date and end_time, periodic events never expire
+    end_at = models.DateTimeField(db_index=True, editable=False, **allow_blank)
 
     title = models.CharField(max_length=32, default=None)
 
     participants = models.ManyToManyField("profiles.UserProfile", blank=True)
+    participants_count = models.IntegerField(default=0, editable=False)
 
     guests = models.CharField(max_length=64, **allow_blank)
     price = models.CharField(max_length=64, **allow_blank)
@@ -122,6 +157,10 @@ class EventMoment(TimestampModel):
 
     location = models.ForeignKey("shared.Location", on_delete=CASCADE, **allow_blank)
 
+    # Copied from the location by shared.locations, for single table geo queries
+    coordinate = geomodels.PointField(editable=False, **allow_blank)
+    place_id = models.CharField(max_length=256, blank=True, default="", editable=False)
+
     reposts_count = models.IntegerField(default=0)
     shares_count = models.IntegerField(default=0)
 
@@ -134,19 +173,47 @@ class EventMoment(TimestampModel):
         self.save()
 
     def add_repost(self):
-        self.reposts_count += 1
-        self.save()
+        EventMoment.objects.filter(id=self.id).update(
+            reposts_count=F("reposts_count") + 1
+        )
 
     def sub_repost(self):
-        self.reposts_count -= 1
-        self.save()
+        EventMoment.objects.filter(id=self.id).update(
+            reposts_count=F("reposts_count") - 1
+        )
 
     def add_share(self):
-        self.shares_count += 1
-        self.save()
+        EventMoment.objects.filter(id=self.id).update(
+            shares_count=F("shares_count") + 1
+        )
 
     class Meta:
-        indexes = [models.Index(fields=["date", "business"])]
+        indexes = [
+            models.Index(fields=["date", "business"]),
+            models.Index(
+                fields=["place_id"],
+                condition=~Q(place_id=""),
+                name="%(app_label)s_%(class)s_place_ix",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.id} • {self.title}"
+
+
+# One row per date an event takes place on, see moments.occurrences
+class EventOccurrence(models.Model):
+    event = models.ForeignKey(
+        "moments.EventMoment", related_name="occurrences", on_delete=CASCADE
+    )
+
+    date = models.DateField()
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("event", "date")
+        indexes = [models.Index(fields=["date", "event"])]
+
+    def __str__(self):
+        return f"{self.event_id} • {self.date}"
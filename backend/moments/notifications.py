@@ -0,0 +1,40 @@
+from devices.models import Device
+from devices.utils import NotificationType, send_bulk_notification
+from profiles.models import UserProfile
+from websocket.actions import SocketActions
+from websocket.utils import send_data_to_socket_channel
+
+"""
+    Fan-outs run in the workers: the devices to notify are read with one query
+    that honours the notification settings, then sent in chunks.
+"""
+
+
+def notify_mentioned_users(moment, profile_ids, on_progress=None):
+    profiles = UserProfile.objects.filter(id__in=profile_ids).select_related("user")
+    data = {"id": moment.id}
+
+    for profile in profiles:
+        socket_channel = f"user.{profile.user.uuid}"
+
+        send_data_to_socket_channel(
+            socket_channel, SocketActions.USER_MENTION_MOMENT, data
+        )
+
+    devices = list(Device.objects.get_notifiable(profile_ids, "moment_mention"))
+
+    return send_bulk_notification(
+        devices, NotificationType.MOMENT_MENTION, moment.user, moment, on_progress
+    )
+
+
+# Users that liked the venue
+def notify_new_event(event, on_progress=None):
+    sender = event.business
+    profiles = sender.likes.exclude(user=sender.owner.user)
+
+    devices = list(Device.objects.get_notifiable(profiles, "new_events"))
+
+    return send_bulk_notification(
+        devices, NotificationType.NEW_EVENT, sender, event, on_progress
+    )
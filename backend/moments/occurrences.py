@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from moments.models import EventMoment, EventOccurrence
+from moments.utils import get_event_bounds
+
+"""
+    Events are listed through their occurrences: one row for a dated event and
+    one per week for a periodic one, for the next OCCURRENCE_WEEKS weeks. They
+    are rebuilt when an event is saved and rolled forward every night, so any
+    date range is read from the (date, event) index.
+"""
+
+OCCURRENCE_WEEKS = 8
+
+
+def get_occurrence_dates(event, today):
+    if event.periodic_day is None:
+        return [] if event.date is None else [event.date]
+
+    # periodic_day is a WeekDays value, numbered as weekday() does.
+    # From yesterday, whose occurrence can still be going on after midnight
+    first_date = today - timedelta(days=1)
+    first_date += timedelta(days=(event.periodic_day - first_date.weekday()) % 7)
+
+    return [first_date + timedelta(weeks=week) for week in range(OCCURRENCE_WEEKS + 1)]
+
+
+def get_occurrences(event, now):
+    occurrences = []
+
+    for date in get_occurrence_dates(event, now.date()):
+        starts_at, ends_at = get_event_bounds(event, date)
+
+        if ends_at >= now:
+            occurrences.append(
+                EventOccurrence(
+                    event=event, date=date, starts_at=starts_at, ends_at=ends_at
+                )
+            )
+
+    return occurrences
+
+
+def refresh_occurrences(events):
+    now = timezone.localtime()
+
+    occurrences = []
+
+    for event in events:
+        occurrences += get_occurrences(event, now)
+
+    EventOccurrence.objects.filter(event__in=events).delete()
+    EventOccurrence.objects.bulk_create(occurrences, batch_size=500)
+
+    return len(occurrences)
+
+
+# Also fills the events saved before occurrences existed
+def roll_occurrences(chunk_size=500):
+    now = timezone.localtime()
+
+    EventOccurrence.objects.filter(ends_at__lt=now).delete()
+
+    events = EventMoment.objects.filter(
+        Q(periodic_day__isnull=False) | Q(date__gte=now.date() - timedelta(days=1))
+    ).order_by("id")
+
+    total = 0
+    chunk = []
+
+    for event in events.iterator(chunk_size=chunk_size):
+        chunk.append(event)
+
+        if len(chunk) == chunk_size:
+            total += refresh_occurrences(chunk)
+            chunk = []
+
+    if chunk:
+        total += refresh_occurrences(chunk)
+
+    return total
+
+
+# First date of the event in the range, null when it does not take place in it.
+# Without from_date it is the first occurrence that did not end yet
+def get_next_occurrence(from_date=None, to_date=None):
+    occurrences = EventOccurrence.objects.filter(event=OuterRef("pk"))
+
+    if from_date is not None:
+        occurrences = occurrences.filter(date__gte=from_date)
+    else:
+        occurrences = occurrences.filter(ends_at__gte=timezone.now())
+
+    if to_date is not None:
+        occurrences = occurrences.filter(date__lte=to_date)
+
+    return Subquery(occurrences.order_by("date").values("date")[:1])
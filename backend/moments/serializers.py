@@ -5,9 +5,10 @@ from business.models import Business
 from business.serializers import ShortBusinessSerializer
 from django.utils import timezone
 from insights.utils import add_repost_to_business, add_repost_to_event
+from moments.choices import MomentStatus
 from moments.models import EventMoment, UserMoment
 from moments.tag_serializers import LocationTagSerializer, UrlTagSerializer
-from moments.utils import get_event_participants
+from moments.utils import EventFriendsGoing
 from profiles.models import UserProfile
 from profiles.serializers import (
     ShortUserProfileSerializer,
@@ -16,8 +17,9 @@ from profiles.serializers import (
 )
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
+from services.relations import is_member
 from services.utils import pop_or_none, update_for_object
-from shared.models import Location
+from shared.models import LOCATION_FIELDS, Location
 from shared.serializers import CreateLocationSerializer, LocationSerializer
 from users.models import User
 
@@ -64,7 +66,7 @@ class CreateUserMomentSerializer(
 
     class Meta:
         model = UserMoment
-        exclude = ("user",)
+        exclude = ("user", "status", *LOCATION_FIELDS)
 
     def save(self, profile, source):
         location_data = self.validated_data.pop("location")
@@ -96,6 +98,7 @@ class CreateUserMomentSerializer(
             location_tag=location_tag,
             end_at=end_at,
             source=source,
+            status=MomentStatus.PENDING,
             **self.validated_data,
         )
 
@@ -105,9 +108,7 @@ class CreateUserMomentSerializer(
 
         if participants is not None:
             users = UserProfile.objects.filter(user__uuid__in=participants)
-
-            for user in users:
-                moment.participants.add(user)
+            moment.participants.add(*users)
 
         return moment
 
@@ -126,9 +127,8 @@ class MomentTagsSerializer(serializers.Serializer):
         return None
 
     def get_participants(self, moment):
-        users = moment.participants.all()
-
-        if users.count() > 0:
+        if moment.participants_count > 0:
+            users = moment.participants.all()
             return ShortUserProfileSerializer(users, many=True).data
         return None
 
@@ -167,7 +167,7 @@ class UserMomentSerializer(
 
     class Meta:
         model = UserMoment
-        exclude = ("uuid", "location")
+        exclude = ("uuid", "location", *LOCATION_FIELDS)
 
     def get_has_custom_source(self, moment):
         return hasattr(moment, "business_tag") and bool(moment.source)
@@ -186,7 +186,10 @@ class UserMomentSerializer(
         if not profile:
             return None
 
-        return profile in moment.replied_by.all()
+        if hasattr(moment, "is_replied"):
+            return moment.is_replied
+
+        return is_member(moment.replied_by, profile)
 
     def get_participants(self, moment):
         user = self.context.get("user")
@@ -194,9 +197,10 @@ class UserMomentSerializer(
         if user is None:
             return None
 
-        users = moment.participants.all()
+        # Served from prefetch_moment_details when the moments come from it
+        users = list(moment.participants.all())
 
-        count = users.count()
+        count = len(users)
 
         if count == 1:
             user = ShortUserProfileSerializer(users, many=True)
@@ -216,15 +220,35 @@ class EventParticipantSerializer(serializers.Serializer):
 class EventGoingSerializer(serializers.Serializer):
     is_going = serializers.SerializerMethodField()
 
-    def get_is_going(self, event):
+    def _get_profile(self):
         user = self.context.get("user")
 
-        profile = user
-
         if isinstance(user, User):
-            profile = user.profile
+            return user.profile
+
+        return user
+
+    # Views pass one for the whole page, single events build their own
+    def _get_friends_going(self, event):
+        friends_going = self.context.get("friends_going")
+
+        if friends_going is None:
+            friends_going = EventFriendsGoing([event], self._get_profile())
+
+        return friends_going
+
+    def get_is_going(self, event):
+        if self.context.get("user") is None:
+            return False
+
+        return self._get_friends_going(event).is_going(event)
+
+    def get_participants_preview(self, event, limit):
+        if self.context.get("user") is None:
+            return None
 
-        return profile in event.participants.all()
+        preview = self._get_friends_going(event).get_preview(event, limit)
+        return EventParticipantSerializer(preview).data
 
 
 class ShortMyEventMomentSerializer(MomentIdSerializer):
@@ -249,18 +273,7 @@ class ShortEventMomentSerializer(ShortMyEventMomentSerializer, EventGoingSeriali
     business_name = serializers.SerializerMethodField()
 
     def get_participants(self, event):
-        user = self.context.get("user", None)
-
-        profile = user
-
-        if isinstance(user, User):
-            profile = user.profile
-
-        if user is not None:
-            participants = get_event_participants(event.uuid, profile, 0, 3)
-            return participants
-
-        return None
+        return self.get_participants_preview(event, 3)
 
     def get_business_name(self, event):
         return event.business.name
@@ -273,8 +286,6 @@ class EventMomentDetailSerializer(
     location = serializers.SerializerMethodField()
     participants = serializers.SerializerMethodField()
     is_going = serializers.SerializerMethodField()
-    participants_count = serializers.SerializerMethodField()
-
     class Meta:
         model = EventMoment
         fields = (
@@ -308,18 +319,7 @@ class EventMomentDetailSerializer(
         return LocationSerializer(location).data
 
     def get_participants(self, event):
-        user = self.context.get("user")
-
-        profile = user
-
-        if isinstance(user, User):
-            profile = user.profile
-
-        participants = get_event_participants(event.uuid, profile, 0, 4)
-        return participants
-
-    def get_participants_count(self, event):
-        return event.participants.count()
+        return self.get_participants_preview(event, 4)
 
 
 class BusinessEventSerializer(ShortEventMomentSerializer, serializers.ModelSerializer):
@@ -357,7 +357,7 @@ class EventMomentSerializer(ShortEventMomentSerializer):
 
     class Meta:
         model = EventMoment
-        fields = "__all__"
+        exclude = LOCATION_FIELDS
 
 
 class CreateOrUpdateEventSerializer(serializers.ModelSerializer):
@@ -366,7 +366,7 @@ class CreateOrUpdateEventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = EventMoment
-        exclude = ("business", "cover")
+        exclude = ("business", "cover", *LOCATION_FIELDS)
 
     def validate_location(self, location):
         if location is None:
@@ -405,7 +405,7 @@ class UpdateEventMomentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = EventMoment
-        exclude = ("business",)
+        exclude = ("business", *LOCATION_FIELDS)
 
     def update(self, moment, validated_data):
         location = pop_or_none("location", validated_data)
@@ -425,4 +425,7 @@ class UpdateEventMomentSerializer(serializers.ModelSerializer):
 class EventRequestSerializer(serializers.Serializer):
     coordinate = CreateCoordinateSerializer()
     place_id = serializers.CharField(required=False)
-    offset = serializers.IntegerField()
+    offset = serializers.IntegerField(required=False, default=0)
+    cursor = serializers.CharField(required=False)
+    from_date = serializers.DateField(required=False)
+    to_date = serializers.DateField(required=False)
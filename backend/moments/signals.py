@@ -1,31 +1,26 @@
-from datetime import datetime, timedelta
-
+from django.db import transaction
 from django.db.models.signals import m2m_changed
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from fieldsignals import post_save_changed
 
-from backend import celery_app
-from devices.models import Device
-from devices.utils import NotificationType
+from moments.choices import MomentStatus
+from moments.managers import ExpiredMomentQuerySet
 from moments.models import UserMoment, EventMoment
-from moments.tasks import delete_expired_event, delete_expired_moment
-from services.date import get_date_tz_aware
-from services.images import crop_image_white_line, moderate_image
-from websocket.actions import SocketActions
-from websocket.utils import send_data_to_socket_channel
+from moments.occurrences import refresh_occurrences
+from moments.tasks import notify_event_created, notify_moment_mention, process_moment
+from moments.utils import get_event_end_at
+from services.counters import connect_counter
 
-import time
+connect_counter(UserMoment, "participants", "participants_count")
+connect_counter(EventMoment, "participants", "participants_count")
 
 
 @receiver(post_delete, sender=UserMoment)
-def on_moment_deleted(instance, **_):
+def on_moment_deleted(instance, origin=None, **_):
     moment = instance
 
-    task_id = f"delete_moment_{moment.id}"
-
-    # Cancel previously scheduled task if it exists
-    celery_app.control.revoke(task_id=task_id, terminate=True)
+    if isinstance(origin, ExpiredMomentQuerySet):
+        return
 
     if moment.location is not None:
         moment.location.delete()
@@ -37,61 +32,41 @@ def on_moment_deleted(instance, **_):
         moment.event.sub_repost()
 
 
-"""
-    Send websocket message when new moment is created and user is mentioned
-"""
-
-
-def on_moment_mentioned(instance, **_):
-    moment = instance
-
-    mentioned_users = moment.participants.all()
-    sender = moment.user
-
-    if mentioned_users.count() > 0:
-        for profile in mentioned_users:
-            socket_channel = f"user.{profile.user.uuid}"
-            data = {"id": moment.id}
+# Users mentioned before publishing are notified by the publish_moment task
+def on_moment_mentioned(instance, action, reverse, pk_set, **_):
+    if action != "post_add" or reverse or not pk_set:
+        return
 
-            send_data_to_socket_channel(
-                socket_channel, SocketActions.USER_MENTION_MOMENT, data
-            )
+    if instance.status != MomentStatus.PUBLISHED:
+        return
 
-            device = Device.objects.filter(user=profile.user).first()
+    moment_id = instance.id
+    profile_ids = list(pk_set)
 
-            if device and not device.is_business:
-                device.send_notification(
-                    NotificationType.MOMENT_MENTION, sender, moment
-                )
+    transaction.on_commit(lambda: notify_moment_mention.delay(moment_id, profile_ids))
 
 
 m2m_changed.connect(on_moment_mentioned, sender=UserMoment.participants.through)
 
 
+# Uploads return right away, the moment is processed once committed
 @receiver(post_save, sender=UserMoment)
 def on_moment_created(instance, created, **_):
-    if not created:
+    if not created or instance.status != MomentStatus.PENDING:
         return
 
-    time.sleep(5)
-
-    source = instance.source
-    does_source_exist = bool(source)
+    moment_id = instance.id
+    transaction.on_commit(lambda: process_moment(moment_id))
 
-    if does_source_exist:
-        if not moderate_image(source.url):
-            UserMoment.objects.filter(id=instance.id).delete()
-            return
 
-        instance.source = crop_image_white_line(source)
-        instance.save()
+@receiver(pre_save, sender=EventMoment)
+def on_event_saved(instance, **_):
+    instance.end_at = get_event_end_at(instance)
 
-    moment_id = instance.id
-    task_id = f"delete_moment_{instance.id}"
 
-    delete_expired_moment.apply_async(
-        args=[moment_id], eta=instance.end_at, task_id=task_id
-    )
+@receiver(post_save, sender=EventMoment)
+def on_event_scheduled(instance, **_):
+    refresh_occurrences([instance])
 
 
 """
@@ -99,67 +74,10 @@ def on_moment_created(instance, created, **_):
 """
 
 
-def get_event_task_data(event):
-    date = event.date
-    start_time = event.time
-    end_time = event.end_time
-
-    if end_time < start_time:
-        date += timedelta(days=1)
-
-    event_datetime_naive = datetime.combine(date, end_time)
-    event_datetime_aware = get_date_tz_aware(event_datetime_naive)
-
-    task_id = f"delete_event_{event.id}"
-
-    return event_datetime_aware, task_id
-
-
 @receiver(post_save, sender=EventMoment)
 def on_event_created(instance, created, **_):
     if not created:
         return
 
-    # 1. Send Push Notification
-
-    event = instance
-    sender = event.business
-
-    # Users that liked the venue
-    profiles = event.business.likes.all().exclude(user=sender.owner.user)
-
-    for profile in profiles:
-        notification_settings = profile.settings["notifications"]
-
-        all_disabled = notification_settings["all"]
-        allowed = notification_settings.get("new_events", True)
-
-        if not all_disabled and allowed:
-            device = Device.objects.filter(user=profile.user).first()
-
-            if device and not device.is_business:
-                device.send_notification(NotificationType.NEW_EVENT, sender, event)
-
-
-@receiver(post_save_changed, sender=EventMoment, fields=["date", "end_time"])
-def on_event_changed(instance, **_):
-    event = instance
-
-    # If the event is not periodic schedule deletion task
-    if event.periodic_day is None:
-        eta, task_id = get_event_task_data(event)
-        # Cancel previously scheduled task if it exists
-        celery_app.control.revoke(task_id, terminate=True)
-
-        # Schedule deletion task for when moment ends with a custom id
-        delete_expired_event.apply_async(args=[event.id], eta=eta, task_id=task_id)
-
-
-@receiver(post_delete, sender=EventMoment)
-def on_event_deleted(instance, **_):
-    event = instance
-
-    task_id = f"delete_event_{event.id}"
-
-    # Cancel previously scheduled task if it exists
-    celery_app.control.revoke(task_id=task_id, terminate=True)
+    event_id = instance.id
+    transaction.on_commit(lambda: notify_event_created.delay(event_id))
@@ -1,7 +1,28 @@
-from celery import shared_task
+import logging
+
+from celery import chain, shared_task
+
+from moments.choices import MomentStatus
+from moments.expiry import sweep_expired_moments
 from moments.models import EventMoment, UserMoment
+from moments.notifications import notify_mentioned_users, notify_new_event
+from moments.occurrences import roll_occurrences
+from services.counters import reconcile_counter
+from services.images import crop_image_white_line, moderate_image
+
+logger = logging.getLogger(__name__)
+
+# Moderation and cropping call external services, failures are retried
+PROCESSING_RETRIES = 3
+PROCESSING_RETRY_BACKOFF = 10
+
+
+@shared_task
+def delete_expired_moments():
+    return sweep_expired_moments()
 
 
+# Kept for the deletions scheduled before the sweep, remove once they ran
 @shared_task
 def delete_expired_moment(moment_id):
     UserMoment.objects.filter(id=moment_id).delete()
@@ -10,3 +31,142 @@ def delete_expired_moment(moment_id):
 @shared_task
 def delete_expired_event(event_id):
     EventMoment.objects.filter(id=event_id).delete()
+
+
+@shared_task
+def roll_event_occurrences():
+    return roll_occurrences()
+
+
+@shared_task
+def reconcile_participants_count():
+    moments = reconcile_counter(UserMoment, "participants", "participants_count")
+    events = reconcile_counter(EventMoment, "participants", "participants_count")
+
+    return moments + events
+
+
+"""
+    New moments stay pending while workers moderate, crop and publish them,
+    each stage receives the moment id and stops the chain returning None.
+
+    Stages are retried with a backoff. A moment that still can't be moderated
+    is rejected by reject_moment, one that can't be cropped is published as it
+    was uploaded.
+"""
+
+
+def get_pending_moment(moment_id):
+    if moment_id is None:
+        return None
+
+    return UserMoment.objects.filter(id=moment_id, status=MomentStatus.PENDING).first()
+
+
+@shared_task(
+    autoretry_for=(Exception,),
+    max_retries=PROCESSING_RETRIES,
+    retry_backoff=PROCESSING_RETRY_BACKOFF,
+)
+def moderate_moment(moment_id):
+    moment = get_pending_moment(moment_id)
+
+    if moment is None:
+        return None
+
+    if moment.source and not moderate_image(moment.source.url):
+        UserMoment.objects.filter(id=moment.id).update(status=MomentStatus.REJECTED)
+        return None
+
+    return moment.id
+
+
+@shared_task(bind=True, max_retries=PROCESSING_RETRIES)
+def crop_moment_source(self, moment_id):
+    moment = get_pending_moment(moment_id)
+
+    if moment is None:
+        return None
+
+    if moment.source:
+        try:
+            moment.source = crop_image_white_line(moment.source)
+            moment.save(update_fields=["source"])
+
+        except Exception as error:
+            if self.request.retries < self.max_retries:
+                countdown = PROCESSING_RETRY_BACKOFF * 2**self.request.retries
+                raise self.retry(exc=error, countdown=countdown)
+
+            logger.exception("Publishing moment %s uncropped", moment.id)
+
+    return moment.id
+
+
+@shared_task(
+    autoretry_for=(Exception,),
+    max_retries=PROCESSING_RETRIES,
+    retry_backoff=PROCESSING_RETRY_BACKOFF,
+)
+def publish_moment(moment_id):
+    moment = get_pending_moment(moment_id)
+
+    if moment is None:
+        return None
+
+    UserMoment.objects.filter(id=moment.id).update(status=MomentStatus.PUBLISHED)
+    profile_ids = list(moment.participants.values_list("id", flat=True))
+
+    if profile_ids:
+        notify_moment_mention.delay(moment.id, profile_ids)
+
+    return moment.id
+
+
+# Errback of the pipeline, once a stage ran out of retries
+@shared_task
+def reject_moment(moment_id):
+    logger.error("Rejecting moment %s, it could not be processed", moment_id)
+
+    pending = UserMoment.objects.filter(id=moment_id, status=MomentStatus.PENDING)
+    pending.update(status=MomentStatus.REJECTED)
+
+
+def process_moment(moment_id):
+    pipeline = chain(
+        moderate_moment.s(moment_id), crop_moment_source.s(), publish_moment.s()
+    )
+    pipeline.apply_async(link_error=reject_moment.si(moment_id))
+
+
+def get_progress_reporter(task):
+    def on_progress(progress):
+        task.update_state(state="PROGRESS", meta=progress)
+
+    return on_progress
+
+
+@shared_task(bind=True)
+def notify_moment_mention(self, moment_id, profile_ids):
+    moment = UserMoment.objects.select_related("user").filter(id=moment_id).first()
+
+    if moment is None:
+        return None
+
+    return notify_mentioned_users(
+        moment, profile_ids, on_progress=get_progress_reporter(self)
+    )
+
+
+@shared_task(bind=True)
+def notify_event_created(self, event_id):
+    event = (
+        EventMoment.objects.select_related("business__owner__user")
+        .filter(id=event_id)
+        .first()
+    )
+
+    if event is None:
+        return None
+
+    return notify_new_event(event, on_progress=get_progress_reporter(self))
@@ -0,0 +1,42 @@
+from datetime import date, datetime, time
+
+from django.test import SimpleTestCase
+
+from moments.choices import WeekDays
+from moments.models import EventMoment
+from moments.occurrences import get_occurrences
+from services.date import get_date_tz_aware
+
+# A Wednesday
+TODAY = date(2026, 10, 14)
+
+
+class PeriodicEventOccurrencesTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.event = EventMoment(
+            title="Party",
+            periodic_day=WeekDays.FRIDAY,
+            time=time(22, 0),
+            end_time=time(2, 0),
+        )
+
+    def get_next_date(self, now):
+        occurrences = get_occurrences(self.event, get_date_tz_aware(now))
+        return occurrences[0].date
+
+    def test_next_occurrence_is_on_the_periodic_day(self):
+        next_date = self.get_next_date(datetime.combine(TODAY, time(12, 0)))
+
+        self.assertEqual(next_date, date(2026, 10, 16))
+        self.assertEqual(next_date.weekday(), WeekDays.FRIDAY)
+
+    def test_next_occurrence_still_going_after_midnight(self):
+        # Saturday at 1, the Friday party ends at 2
+        self.assertEqual(
+            self.get_next_date(datetime(2026, 10, 17, 1, 0)), date(2026, 10, 16)
+        )
+
+        # Saturday at 3, the next one is the following Friday
+        self.assertEqual(
+            self.get_next_date(datetime(2026, 10, 17, 3, 0)), date(2026, 10, 23)
+        )
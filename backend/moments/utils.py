@@ -3,13 +3,100 @@ from itertools import groupby
 
 from django.db.models.query_utils import Q
 
-from django.db.models import FloatField, Case, When
+from django.db.models import Exists, FloatField, Case, OuterRef, Prefetch, When
 from django.contrib.gis.db.models.functions import Distance as GeoDistance
-from django.db.models.functions import Coalesce
 from django.db.models.query_utils import Q
-from services.date import get_current_date
-from moments.models import EventMoment
-from profiles.models import UserFriend
+from services.date import get_current_date, get_date_tz_aware
+from moments.models import EventMoment, UserMoment
+from profiles.models import UserFriend, UserProfile
+
+
+"""
+    Loads what UserMomentSerializer renders with a fixed number of queries:
+    related rows are joined, participants prefetched and `replied` annotated.
+"""
+
+
+def prefetch_moment_details(queryset, user=None):
+    participants = UserProfile.objects.select_related("user")
+
+    queryset = queryset.select_related(
+        "user__user", "event", "business_tag__location", "location_tag"
+    ).prefetch_related(Prefetch("participants", queryset=participants))
+
+    if user is None:
+        return queryset
+
+    profile = user if isinstance(user, UserProfile) else user.profile
+
+    replied = UserMoment.replied_by.through.objects.filter(
+        usermoment=OuterRef("pk"), userprofile=profile
+    )
+
+    return queryset.annotate(is_replied=Exists(replied))
+
+
+# Start and end of the event on a date, it ends the day after past midnight
+def get_event_bounds(event, date):
+    starts_at = get_date_tz_aware(datetime.combine(date, event.time))
+
+    if event.end_time < event.time:
+        date += timedelta(days=1)
+
+    ends_at = get_date_tz_aware(datetime.combine(date, event.end_time))
+
+    return starts_at, ends_at
+
+
+def get_event_end_at(event):
+    if event.periodic_day is not None or event.date is None:
+        return None
+
+    _, ends_at = get_event_bounds(event, event.date)
+
+    return ends_at
+
+
+"""
+    Friends going to a page of events, and whether the viewer goes, with two
+    queries: the friends of the viewer, then the participations among them.
+"""
+
+
+class EventFriendsGoing(object):
+    def __init__(self, events, profile):
+        self.friends = {event.id: [] for event in events}
+        self.going = set()
+
+        friendships = UserFriend.objects.filter(Q(user=profile) | Q(friend=profile))
+        friend_ids = set()
+
+        for user_id, friend_id in friendships.values_list("user", "friend"):
+            friend_ids.add(friend_id if user_id == profile.id else user_id)
+
+        Participant = EventMoment.participants.through
+
+        participants = (
+            Participant.objects.filter(
+                eventmoment__in=list(self.friends),
+                userprofile__in=friend_ids | {profile.id},
+            )
+            .select_related("userprofile__user")
+            .order_by("id")
+        )
+
+        for participant in participants:
+            if participant.userprofile_id == profile.id:
+                self.going.add(participant.eventmoment_id)
+            else:
+                self.friends[participant.eventmoment_id].append(participant.userprofile)
+
+    def is_going(self, event):
+        return event.id in self.going
+
+    def get_preview(self, event, limit):
+        friends = self.friends.get(event.id, [])
+        return {"users": friends[:limit], "count": len(friends)}
 
 
 def get_event_participants(event_id, user, offset, limit):
@@ -75,10 +162,7 @@ def get_my_events_using_position(data, profile):
         distance=Case(
             When(
                 has_activity=True,
-                then=GeoDistance(
-                    Coalesce("business__location__coordinate", "location__coordinate"),
-                    coordinate,
-                ),
+                then=GeoDistance("coordinate", coordinate),
             ),
             default=None,
             output_field=FloatField(),
@@ -1,11 +1,17 @@
 import json
+
+from django.db.models import F
+
 from authentication.api_views import BusinessAuthenticationAPIView
 from authentication.decorators import authentication_mixin
 from business.models import Business
+from core.pagination import get_page_headers, get_page_params, paginate
 from core.querylimits import QueryLimits
 from discussions.utils import create_or_update_discussion
+from moments.choices import MomentStatus
 from moments.functions import get_event_moments_by, get_user_moments_by
 from moments.models import EventMoment, UserMoment
+from moments.occurrences import get_next_occurrence
 from moments.serializers import (
     CreateUserMomentSerializer,
     EventMomentDetailSerializer,
@@ -19,7 +25,9 @@ from moments.serializers import (
     EventRequestSerializer,
 )
 from moments.utils import (
+    EventFriendsGoing,
     get_event_participants,
+    prefetch_moment_details,
 )
 from profiles.serializers import ShortUserProfileSerializer
 from rest_framework.decorators import api_view
@@ -32,18 +40,19 @@ from rest_framework.status import (
 )
 from rest_framework.views import APIView
 from services.date import date_from
+from services.relations import toggle_member
 from services.utils import cast_to_int
 from services.images import moderate_image
 
 
 @api_view(["POST", "GET"])
 def get_user_moments(request):
-    moments = get_user_moments_by(request)
+    page = get_user_moments_by(request)
 
     context = {"user": request.user}
-    moments = UserMomentSerializer(moments, many=True, context=context)
+    moments = UserMomentSerializer(page.items, many=True, context=context)
 
-    return Response(moments.data, status=HTTP_200_OK)
+    return Response(moments.data, status=HTTP_200_OK, headers=get_page_headers(page))
 
 
 @api_view(["GET"])
@@ -52,7 +61,8 @@ def get_user_moments_by_id(request):
 
     context = {"user": request.user}
 
-    moments = UserMoment.objects.filter(user__user__uuid=user_id)
+    moments = UserMoment.objects.get_published().filter(user__user__uuid=user_id)
+    moments = prefetch_moment_details(moments, request.user)
     moments = UserMomentSerializer(moments, many=True, context=context)
 
     return Response(moments.data, status=HTTP_200_OK)
@@ -93,9 +103,13 @@ class UserMomentAPIView(APIView):
     def get(self, request):
         offset = cast_to_int(request.query_params.get("offset"))
 
+        # Pending moments are shown to their author only
         moments = UserMoment.objects.filter(
             user=request.user.profile, created_at__gte=date_from(1)
-        )[offset : offset + QueryLimits.MY_MOMENTS]
+        ).exclude(status=MomentStatus.REJECTED)
+        moments = prefetch_moment_details(moments, request.user)
+
+        moments = moments[offset : offset + QueryLimits.MY_MOMENTS]
 
         context = {"user": request.user}
 
@@ -148,10 +162,16 @@ def get_event_moments(request):
         user = request.user
         data = serializer.validated_data
 
-        events = get_event_moments_by(data)
-        events = ShortEventMomentSerializer(events, context={"user": user}, many=True)
+        page = get_event_moments_by(data)
 
-        return Response(events.data, status=HTTP_200_OK)
+        friends_going = EventFriendsGoing(page.items, user.profile)
+        context = {"user": user, "friends_going": friends_going}
+
+        events = ShortEventMomentSerializer(page.items, context=context, many=True)
+
+        return Response(
+            events.data, status=HTTP_200_OK, headers=get_page_headers(page)
+        )
 
     print(serializer.errors)
 
@@ -208,23 +228,18 @@ class EventMomentAPIView(BusinessAuthenticationAPIView):
         return Response(status=HTTP_400_BAD_REQUEST)
 
     def get(self, request):
-        order_by_params = ("date", "time")
         business = request.business
 
-        # First get periodic events
-        periodic_events = EventMoment.objects.filter(
-            business=business, date__isnull=True
-        ).order_by(*order_by_params)
-
-        events = EventMoment.objects.filter(
-            business=business, date__isnull=False
-        ).order_by(*order_by_params)
-
-        all_events = list(periodic_events) + list(events)
+        # Next ones first, the ones that ended last
+        events = (
+            EventMoment.objects.filter(business=business)
+            .annotate(next_date=get_next_occurrence())
+            .order_by(F("next_date").asc(nulls_last=True), "time", "id")
+        )
 
-        all_events = ShortVenueEventPreviewSerializer(all_events, many=True)
+        events = ShortVenueEventPreviewSerializer(events, many=True)
 
-        return Response(all_events.data, status=HTTP_200_OK)
+        return Response(events.data, status=HTTP_200_OK)
 
     def delete(self, request):
         params = request.query_params
@@ -243,8 +258,14 @@ def get_event_moment_detail(request):
     event_id = request.query_params.get("eventId")
 
     try:
-        event = EventMoment.objects.get(uuid=event_id)
-        event = EventMomentDetailSerializer(event, context={"user": request.user})
+        event = EventMoment.objects.select_related(
+            "business__location", "location"
+        ).get(uuid=event_id)
+
+        friends_going = EventFriendsGoing([event], request.user.profile)
+        context = {"user": request.user, "friends_going": friends_going}
+
+        event = EventMomentDetailSerializer(event, context=context)
 
         return Response(event.data, status=HTTP_200_OK)
     except EventMoment.DoesNotExist:
@@ -266,12 +287,7 @@ def user_go_to_event(request):
         profile = request.user.profile
         participants = event.participants
 
-        if profile in participants.all():
-            participants.remove(profile)
-            is_going = False
-        else:
-            participants.add(profile)
-            is_going = True
+        is_going = toggle_member(participants, profile)
 
         discussion = create_or_update_discussion(event, profile, is_going)
 
@@ -310,16 +326,19 @@ def get_my_events(request):
     if serializer.is_valid():
         data = serializer.validated_data
 
-        offset = data.get("offset")
-        up_offset = offset + 8
-
-        events = EventMoment.objects.get_mine(profile).order_by("date")[
-            offset:up_offset
-        ]
+        page = paginate(
+            EventMoment.objects.get_mine(profile),
+            ("date", "id"),
+            QueryLimits.EVENT_MOMENTS_LIST,
+            cursor=data.get("cursor"),
+            offset=data.get("offset"),
+        )
 
-        events = ShortMyEventMomentSerializer(events, many=True)
+        events = ShortMyEventMomentSerializer(page.items, many=True)
 
-        return Response(events.data, status=HTTP_200_OK)
+        return Response(
+            events.data, status=HTTP_200_OK, headers=get_page_headers(page)
+        )
 
     print(serializer.errors)
 
@@ -332,18 +351,23 @@ def get_business_moments(request):
     params = request.query_params
 
     business_id = params.get("businessId")
-    offset = cast_to_int(params.get("offset"))
-    up_offset = offset + 8
+    cursor, offset = get_page_params(params)
 
     business = Business.objects.filter(uuid=business_id).first()
 
     if business is None:
         return Response(status=HTTP_404_NOT_FOUND)
 
-    moments = UserMoment.objects.filter(business_tag=business).order_by("-created_at")[
-        offset:up_offset
-    ]
+    moments = UserMoment.objects.get_published().filter(business_tag=business)
 
-    moments = UserMomentSerializer(moments, context={"user": user}, many=True)
+    page = paginate(
+        prefetch_moment_details(moments, user),
+        ("-created_at", "-id"),
+        QueryLimits.USER_FEEDS,
+        cursor=cursor,
+        offset=offset,
+    )
 
-    return Response(moments.data, status=HTTP_200_OK)
+    moments = UserMomentSerializer(page.items, context={"user": user}, many=True)
+
+    return Response(moments.data, status=HTTP_200_OK, headers=get_page_headers(page))
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 from core.fields import UniqueNameFileField
 from core.models import TimestampModel
@@ -61,6 +63,14 @@ class UserProfile(models.Model):
         self.latest_place_id = place_id
         self.save()
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("username"), name="gin_trgm_ops"),
+                name="%(app_label)s_username_trgm_ix",
+            )
+        ]
+
     def set_picture(self, picture):
         self.picture.delete(save=True)
         self.picture = picture
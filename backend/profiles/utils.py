@@ -1,11 +1,11 @@
 import binascii
 import os
-from django.db.models import Count
 from moments.models import UserMoment
 from services.utils import flatten_list
 from spots.models import Spot
 from chat.models import Chat
-from profiles.models import UserFriend, UserFriendRequest
+from django.db.models.query_utils import Q
+from profiles.models import UserFriend, UserFriendRequest, UserProfile
 from rest_framework.response import Response
 
 
@@ -46,14 +46,14 @@ def get_friendship_state(my_user, user):
 
 
 def get_chats_recent(user):
-    from chat.models import Chat
+    from chat.inbox import get_inbox
 
-    recent_chats = Chat.objects.get_recent(user)[:8]
+    entries = get_inbox(user).filter(chat__isnull=False)[:8]
 
     users = []
-    for chat in recent_chats:
-        sender = chat.sender
-        receiver = chat.receiver
+    for entry in entries:
+        sender = entry.chat.sender
+        receiver = entry.chat.receiver
 
         if user == sender:
             users.append(receiver)
@@ -71,6 +71,16 @@ def handle_blocked_user(user, blocked_user):
     Chat.objects.remove_blocked(*args)
 
 
+# Block rows between two profiles, whoever blocked whom
+def get_blocks_between(profile, other):
+    Block = UserProfile.blocked_users.through
+
+    return Block.objects.filter(
+        Q(from_userprofile=profile, to_userprofile=other)
+        | Q(from_userprofile=other, to_userprofile=profile)
+    )
+
+
 def generate_hex_token():
     return binascii.hexlify(os.urandom(20)).decode()
 
@@ -85,12 +95,10 @@ def get_profile_info(profile):
     moments = UserMoment.objects.get_moments_where_im_tagged(profile).values("id")
 
     spot_replies = list(
-        Spot.objects.filter(profile=profile)
-        .annotate(count=Count("replies"))
-        .values("uuid", "count")
+        Spot.objects.filter(profile=profile).values("uuid", "replies_count")
     )
 
-    spot_replies = [f"{spot['uuid']}:{spot['count']}" for spot in spot_replies]
+    spot_replies = [f"{spot['uuid']}:{spot['replies_count']}" for spot in spot_replies]
 
     requests = flatten_list(requests)
     moments = flatten_list(moments)
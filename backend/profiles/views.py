@@ -1,5 +1,4 @@
-from django.db.models.query_utils import Q
-from django.db.models import F
+from django.db.models import Exists, F, OuterRef
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.status import (
@@ -10,9 +9,11 @@ from rest_framework.status import (
 from rest_framework.views import APIView
 
 from authentication.decorators import authentication_mixin
+from core.pagination import get_page_headers, get_page_params, paginate
 from core.querylimits import QueryLimits
 from moments.models import UserMoment
 from moments.serializers import UserMomentSerializer
+from moments.utils import prefetch_moment_details
 from profiles.models import UserProfile, UserFriendRequest, UserFriend
 from profiles.serializers import (
     ShortUserProfileSerializer,
@@ -20,8 +21,14 @@ from profiles.serializers import (
     UserFriendRequestSerializer,
     LongUserProfileSerializer,
 )
-from profiles.utils import get_chats_recent, handle_blocked_user
+from profiles.utils import (
+    get_blocks_between,
+    get_chats_recent,
+    handle_blocked_user,
+)
 from services.images import moderate_image_bytes
+from services.relations import toggle_member
+from services.search import search_profiles
 from services.utils import cast_to_int
 from users.models import User
 
@@ -108,11 +115,8 @@ class BlockUser(APIView):
             return Response(status=HTTP_404_NOT_FOUND)
 
         # I'm blocking the user
-        if profile not in blocked_users.all():
-            blocked_users.add(profile)
+        if toggle_member(blocked_users, profile):
             handle_blocked_user(my_profile, profile)
-        else:
-            blocked_users.remove(profile)
 
         return Response(status=HTTP_200_OK)
 
@@ -122,20 +126,24 @@ def search_users(request):
     params = request.query_params
 
     profile = request.user.profile
-    blocked_users = profile.blocked_users.all()
 
     value = params.get("value", "")
-    offset = cast_to_int(params.get("offset"))
-    up_offset = offset + QueryLimits.SEARCH_USERS
+    cursor, offset = get_page_params(params)
+
+    users = UserProfile.objects.exclude(id=profile.id).exclude(
+        Exists(get_blocks_between(profile, OuterRef("pk")))
+    )
 
-    users = UserProfile.objects.filter(
-        Q(username__icontains=value)
-        & ~Q(blocked_users__in=[profile])
-        & ~Q(id=profile.id)
-    ).exclude(id__in=blocked_users)[offset:up_offset]
+    page = paginate(
+        search_profiles(users, value),
+        ("-rank", "id"),
+        QueryLimits.SEARCH_USERS,
+        cursor=cursor,
+        offset=offset,
+    )
 
-    users = ShortUserProfileSerializer(users, many=True).data
-    return Response(users, status=HTTP_200_OK)
+    users = ShortUserProfileSerializer(page.items, many=True).data
+    return Response(users, status=HTTP_200_OK, headers=get_page_headers(page))
 
 
 class UserFeedAPIView(APIView):
@@ -147,9 +155,8 @@ class UserFeedAPIView(APIView):
 
         profile = request.user.profile
 
-        moments = UserMoment.objects.get_moments_where_im_tagged(profile)[
-            offset:up_offset
-        ]
+        moments = UserMoment.objects.get_moments_where_im_tagged(profile)
+        moments = prefetch_moment_details(moments, profile)[offset:up_offset]
 
         context = {"user": request.user}
 
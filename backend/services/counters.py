@@ -0,0 +1,125 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed
+
+"""
+    Counter columns mirror the size of a many to many relation, e.g. the
+    likes_count of a business. Adds and removes move them by the number of
+    changed rows with a single UPDATE of F(counter), which the database applies
+    atomically, so a like costs the same on a venue with any number of likes.
+    Forward clears reset them, and the nightly reconciliation recounts the
+    through tables to fix any drift.
+"""
+
+
+def get_relation_count(model, relation):
+    field = model._meta.get_field(relation)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+
+    count = (
+        through.objects.filter(**{source: OuterRef("pk")})
+        .order_by()
+        .values(source)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+    return Coalesce(Subquery(count), 0)
+
+
+def refresh_counter(model, relation, counter, ids):
+    model.objects.filter(pk__in=ids).update(
+        **{counter: get_relation_count(model, relation)}
+    )
+
+
+def add_to_counter(model, counter, ids, delta):
+    model.objects.filter(pk__in=ids).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
+
+
+# Rows of the relation that are about to be removed, as (counter row id, count).
+# Removes and reverse clears don't tell which of their ids were related
+def get_removed_rows(through, source, target, instance, reverse, pk_set):
+    if not reverse:
+        rows = through.objects.filter(**{source: instance.pk, f"{target}__in": pk_set})
+        return [(instance.pk, rows.count())]
+
+    rows = through.objects.filter(**{target: instance.pk})
+
+    if pk_set is not None:
+        rows = rows.filter(**{f"{source}__in": pk_set})
+
+    return [(id, 1) for id in rows.values_list(source, flat=True)]
+
+
+# on_refresh is called with the ids of the refreshed rows
+def connect_counter(model, relation, counter, on_refresh=None):
+    field = model._meta.get_field(relation)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+
+    # Set on pre_remove and pre_clear, read by the post signal of the same call
+    removed_attr = f"_{counter}_removed"
+
+    def on_relation_changed(instance, action, reverse, pk_set, **_):
+        if action in ("pre_remove", "pre_clear"):
+            if reverse or action == "pre_remove":
+                removed = get_removed_rows(
+                    through, source, target, instance, reverse, pk_set
+                )
+                setattr(instance, removed_attr, removed)
+            return
+
+        if action == "post_add":
+            if not pk_set:
+                return
+
+            if reverse:
+                ids = list(pk_set)
+                add_to_counter(model, counter, ids, 1)
+            else:
+                ids = [instance.pk]
+                add_to_counter(model, counter, ids, len(pk_set))
+
+        elif action in ("post_remove", "post_clear"):
+            if action == "post_clear" and not reverse:
+                ids = [instance.pk]
+                model.objects.filter(pk=instance.pk).update(**{counter: 0})
+            else:
+                removed = instance.__dict__.pop(removed_attr, [])
+                ids = [id for id, count in removed if count > 0]
+
+                for id, count in removed:
+                    if count > 0:
+                        add_to_counter(model, counter, [id], -count)
+
+        else:
+            return
+
+        if ids and on_refresh is not None:
+            on_refresh(ids)
+
+    m2m_changed.connect(
+        on_relation_changed,
+        sender=through,
+        weak=False,
+        dispatch_uid=f"{model._meta.label}.{counter}",
+    )
+
+
+# Returns the number of rows that drifted and have been fixed
+def reconcile_counter(model, relation, counter, chunk_size=1000):
+    ids = list(
+        model.objects.annotate(actual_count=get_relation_count(model, relation))
+        .exclude(**{counter: F("actual_count")})
+        .values_list("pk", flat=True)
+    )
+
+    for index in range(0, len(ids), chunk_size):
+        refresh_counter(model, relation, counter, ids[index : index + chunk_size])
+
+    return len(ids)
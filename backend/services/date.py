@@ -33,17 +33,33 @@ def get_date_tz_aware(date):
     return timezone.make_aware(date, timezone.get_default_timezone())
 
 
-# Use to get date for querying businesses based on timetable
-def get_date_for_search(date):
-    return datetime(2023, 1, 1, date.hour, date.minute, tzinfo=utc_timezone)
+# From monday 00:00 to sunday 23:59 of the current week
+def get_this_week_range():
+    today = today_date()
+    from_date = today - timedelta(days=today.weekday())
+    to_date = from_date + timedelta(days=6)
 
+    from_date = timezone.make_aware(datetime.combine(from_date, datetime.min.time()))
+    to_date = timezone.make_aware(datetime.combine(to_date, datetime.max.time()))
 
-def get_midnight_for_search():
-    return datetime(2023, 1, 2, 0, 0, tzinfo=utc_timezone)
+    return from_date, to_date
 
 
-def get_tonight_threshold_for_search():
-    return datetime(2023, 1, 1, 23, 0, tzinfo=utc_timezone)
+MINUTES_IN_DAY = 24 * 60
+MINUTES_IN_WEEK = 7 * MINUTES_IN_DAY
+
+WEEK_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+TONIGHT_THRESHOLD = time(23, 0)
+
+
+# Use to get the minute of the week (monday 00:00 is 0) for querying businesses based on timetable
+def get_minute_of_week(date):
+    return date.weekday() * MINUTES_IN_DAY + date.hour * 60 + date.minute
+
+
+def get_tonight_minute_of_week(date):
+    return get_minute_of_week(datetime.combine(date.date(), TONIGHT_THRESHOLD))
 
 
 def get_yesterday_and_today(date, offset_midnight=False):
@@ -0,0 +1,21 @@
+from django.db import transaction
+
+EXPIRY_BATCH_SIZE = 500
+
+
+# Deletes the rows of the queryset a batch of ids at a time, returns how many
+def sweep_expired(queryset, delete, batch_size=EXPIRY_BATCH_SIZE):
+    queryset = queryset.order_by().values_list("id", flat=True)
+
+    total = 0
+
+    while True:
+        ids = list(queryset[:batch_size])
+
+        if not ids:
+            return total
+
+        with transaction.atomic():
+            delete(ids)
+
+        total += len(ids)
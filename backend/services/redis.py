@@ -0,0 +1,14 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+# Shared connection pool, for data structures the cache api doesn't expose
+def get_redis():
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_DOMAIN, decode_responses=True)
+
+    return _client
@@ -0,0 +1,41 @@
+from django.db.models import Exists, OuterRef
+
+"""
+    Membership of a many to many relation is checked on its through table,
+    whose unique (source, target) index answers the EXISTS, instead of loading
+    every member. Adds and removes go through the related manager, so the
+    m2m_changed receivers (counters, leaderboards) keep running.
+"""
+
+
+# Through rows linking the instance of a related manager to the target id
+def get_membership(relation, target):
+    lookups = {
+        relation.source_field_name: relation.instance.pk,
+        relation.target_field_name: target,
+    }
+
+    return relation.through.objects.filter(**lookups)
+
+
+def is_member(relation, obj):
+    if obj is None:
+        return False
+
+    return get_membership(relation, obj.pk).exists()
+
+
+# Annotates each row of the queryset with whether it is a member of the relation
+def annotate_membership(queryset, relation, name):
+    membership = get_membership(relation, OuterRef("pk"))
+    return queryset.annotate(**{name: Exists(membership)})
+
+
+# Returns True when the object was added, False when it was removed
+def toggle_member(relation, obj):
+    if is_member(relation, obj):
+        relation.remove(obj)
+        return False
+
+    relation.add(obj)
+    return True
@@ -0,0 +1,83 @@
+import re
+
+from django.contrib.gis.db.models.functions import Distance as GeoDistance
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import Case, ExpressionWrapper, FloatField, Value, When
+from django.db.models.functions import Cast
+from django.db.models.query_utils import Q
+
+# No stemming nor stop words: names aren't sentences
+SEARCH_CONFIG = "simple"
+
+# Meters at which the relevance of a venue is halved
+SEARCH_DISTANCE_DECAY = 5000
+
+
+def get_search_vector(field):
+    return SearchVector(field, config=SEARCH_CONFIG)
+
+
+# Every word of the value is matched as a prefix, e.g. "caf ro" matches "Café Roma"
+def get_prefix_query(value):
+    words = re.findall(r"\w+", value)
+
+    if len(words) == 0:
+        return None
+
+    raw_query = " & ".join(f"{word}:*" for word in words)
+
+    return SearchQuery(raw_query, config=SEARCH_CONFIG, search_type="raw")
+
+
+# Prefix matches come first, then the most similar values
+def get_text_rank(field, value):
+    is_prefix = Case(
+        When(**{f"{field}__istartswith": value}, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    return is_prefix + TrigramSimilarity(field, value)
+
+
+"""
+    Searches are served by the trigram index on UPPER(field), which icontains
+    uses, and by the full text index on the search vector of venue names.
+"""
+
+
+def search_profiles(queryset, value):
+    value = value.strip()
+
+    return queryset.filter(username__icontains=value).annotate(
+        rank=get_text_rank("username", value)
+    )
+
+
+def search_businesses(queryset, value, position=None):
+    value = value.strip()
+
+    query = get_prefix_query(value)
+
+    vector = get_search_vector("name")
+    rank = get_text_rank("name", value)
+
+    queryset = queryset.annotate(search=vector)
+    condition = Q(name__icontains=value)
+
+    if query is not None:
+        condition |= Q(search=query)
+        rank = rank + SearchRank(vector, query)
+
+    if position is not None:
+        distance = Cast(GeoDistance("coordinate", position), FloatField())
+        rank = rank / (1.0 + distance / SEARCH_DISTANCE_DECAY)
+
+    return queryset.filter(condition).annotate(
+        rank=ExpressionWrapper(rank, output_field=FloatField())
+    )
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from shared.models import Amenity, BusinessCategory
+from shared.serializers import StaticFeatureSerializer
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+"""
+    Categories and amenities are kept in memory by every process.
+    Admin edits bump the version in redis, so processes reload them on the next read.
+"""
+
+
+class Catalog(object):
+    def __init__(self, version):
+        self.version = version
+
+        self.categories = list(BusinessCategory.objects.all().order_by("-weight"))
+        self.amenities = list(Amenity.objects.all().order_by("-weight"))
+
+        # Serialized features per language, e.g. {("categories", "en"): [...]}
+        self.features = {}
+
+    def get_features(self, name, language):
+        key = (name, language)
+
+        if key not in self.features:
+            features = getattr(self, name)
+            context = {"language": language}
+
+            self.features[key] = StaticFeatureSerializer(
+                features, many=True, context=context
+            ).data
+
+        return self.features[key]
+
+
+_catalog = None
+_lock = threading.Lock()
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_catalog():
+    global _catalog
+
+    version = get_catalog_version()
+
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = Catalog(version)
+
+        return _catalog
@@ -0,0 +1,61 @@
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from business.models import Business
+from moments.models import EventMoment, UserMoment
+from shared.models import Location
+
+"""
+    Venues, moments and events store the coordinate and place_id of their
+    location, so radius and city queries read a single table and its spatial
+    index. Events use the location of their venue, or their own one.
+"""
+
+
+def get_location_value(field, location):
+    locations = Location.objects.filter(id=OuterRef(location)).values(field)[:1]
+    return Subquery(locations)
+
+
+def get_venue_location_value(field):
+    businesses = Business.objects.filter(id=OuterRef("business"))
+    return Subquery(businesses.values(f"location__{field}")[:1])
+
+
+def get_location_values(model):
+    if model is EventMoment:
+        coordinate = Coalesce(
+            get_venue_location_value("coordinate"),
+            get_location_value("coordinate", "location"),
+        )
+        place_id = Coalesce(
+            NullIf(get_venue_location_value("place_id"), Value("")),
+            NullIf(get_location_value("place_id", "location"), Value("")),
+            Value(""),
+        )
+    else:
+        coordinate = get_location_value("coordinate", "location")
+        place_id = Coalesce(get_location_value("place_id", "location"), Value(""))
+
+    return {"coordinate": coordinate, "place_id": place_id}
+
+
+def sync_locations(queryset):
+    return queryset.update(**get_location_values(queryset.model))
+
+
+# Rows that read their position from the location
+def sync_location(location):
+    sync_locations(Business.objects.filter(location=location))
+    sync_locations(UserMoment.objects.filter(location=location))
+    events = EventMoment.objects.filter(
+        Q(location=location) | Q(business__location=location)
+    )
+    sync_locations(events)
+
+
+def rebuild_locations():
+    return sum(
+        sync_locations(model.objects.all())
+        for model in (Business, UserMoment, EventMoment)
+    )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shared.locations import rebuild_locations
+
+
+class Command(BaseCommand):
+    help = "Copy the coordinate and place_id of the locations to their rows"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_locations()
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {count} rows"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from business.tasks import rebuild_leaderboards, reconcile_likes_count
+from moments.tasks import reconcile_participants_count
+from spots.tasks import reconcile_replies_count
+
+
+class Command(BaseCommand):
+    help = "Recount the counter columns and rebuild the leaderboards from them"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = (
+                reconcile_likes_count()
+                + reconcile_replies_count()
+                + reconcile_participants_count()
+            )
+
+        rebuild_leaderboards()
+
+        self.stdout.write(self.style.SUCCESS(f"Fixed {count} counters"))
@@ -9,6 +9,9 @@ char_options = {"max_length": 128, "blank": True, "null": True}
 
 allow_blank = {"blank": True, "null": True}
 
+# Copied from Location to the rows queried by position, see shared.locations
+LOCATION_FIELDS = ("coordinate", "place_id")
+
 
 class Location(TimestampModel):
     address = models.CharField(**char_options)
@@ -1,7 +1,14 @@
 import os
-from django.db import models
+from django.db import connections, models, transaction
 from django.dispatch import receiver
 from django.db.models import FileField
+from django.db.models.signals import post_delete, post_save, pre_migrate
+
+from business.models import Business
+from moments.models import EventMoment, UserMoment
+from shared.catalog import bump_catalog_version
+from shared.locations import sync_location, sync_locations
+from shared.models import LOCATION_FIELDS, Amenity, BusinessCategory, Location
 
 
 @receiver(models.signals.post_delete, sender=FileField)
@@ -9,3 +16,41 @@ def auto_delete_file_on_delete(sender, instance, **kwargs):
     if instance.file:
         if os.path.isfile(instance.file.path):
             os.remove(instance.file.path)
+
+
+# Trigram indexes and similarity need pg_trgm before any migration creates them
+@receiver(pre_migrate, dispatch_uid="shared.create_trigram_extension")
+def create_trigram_extension(sender, using, **kwargs):
+    if sender.name != "shared":
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+# Bumped once the edit is committed, so no process reloads the old rows
+@receiver([post_save, post_delete], sender=BusinessCategory)
+@receiver([post_save, post_delete], sender=Amenity)
+def on_catalog_changed(**kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Location)
+def on_location_saved(instance, created, **_):
+    # New locations have no rows yet, these sync when they are saved
+    if not created:
+        sync_location(instance)
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_save, sender=UserMoment)
+@receiver(post_save, sender=EventMoment)
+def on_located_saved(sender, instance, **_):
+    sync_locations(sender.objects.filter(id=instance.id))
+
+    # The update skips the instance, which is still read after the save
+    instance.refresh_from_db(fields=LOCATION_FIELDS)
+
+    # Events take the position of their venue
+    if sender is Business:
+        sync_locations(EventMoment.objects.filter(business=instance))
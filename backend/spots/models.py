@@ -16,6 +16,10 @@ class Spot(TimestampModel):
     content = TextField(max_length=300)
 
     replies = models.ManyToManyField('profiles.UserProfile', related_name='replies', blank=True)
+    replies_count = models.IntegerField(default=0, editable=False)
+
+    class Meta(TimestampModel.Meta):
+        indexes = [models.Index(fields=['created_at'])]
 
     def __str__(self):
         return f"{self.id} • {self.business.name}"
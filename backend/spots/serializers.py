@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from business.models import Business
 from profiles.serializers import ShortUserProfileSerializer
+from services.relations import is_member
 from .models import Spot
 
 
@@ -16,7 +17,6 @@ class SpotSerializer(SpotIdSerializer, serializers.ModelSerializer):
     profile = ShortUserProfileSerializer()
     is_replied = serializers.SerializerMethodField()
     business_id = serializers.SerializerMethodField()
-    replies_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Spot
@@ -34,14 +34,11 @@ class SpotSerializer(SpotIdSerializer, serializers.ModelSerializer):
     def get_is_replied(self, spot):
         profile = self.context.get("user").profile
 
-        return profile in spot.replies.all()
+        return is_member(spot.replies, profile)
 
     def get_business_id(self, spot):
         return spot.business.uuid
 
-    def get_replies_count(self, spot):
-        return spot.replies.count()
-
 
 class CreateSpotSerializer(SpotIdSerializer):
     content = serializers.CharField(max_length=300)
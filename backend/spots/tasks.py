@@ -1,7 +1,32 @@
+from datetime import timedelta
+
 from celery import shared_task
+from django.utils import timezone
+
+from services.counters import reconcile_counter
+from services.expiry import sweep_expired
 from .models import Spot
 
+SPOT_LIFETIME = timedelta(days=2)
+
+
+def delete_spots(ids):
+    Spot.objects.filter(id__in=ids).delete()
+
+
+@shared_task
+def delete_expired_spots():
+    expired = Spot.objects.filter(created_at__lt=timezone.now() - SPOT_LIFETIME)
+
+    return sweep_expired(expired, delete_spots)
+
 
+# Kept for the deletions scheduled before the sweep, remove once they ran
 @shared_task
 def delete_expired_spot(spot_id):
     Spot.objects.filter(id=spot_id).delete()
+
+
+@shared_task
+def reconcile_replies_count():
+    return reconcile_counter(Spot, "replies", "replies_count")
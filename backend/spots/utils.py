@@ -6,8 +6,6 @@ from .models import Spot
 
 
 def send_spot_reply_notification(my_profile, spot):
-    replies_count = spot.replies.count()
-
     recevier = spot.profile.user
 
     data = {"id": spot.uuid}
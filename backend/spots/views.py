@@ -1,4 +1,6 @@
 from business.serializers import ShortBusinessSerializer
+from core.pagination import get_page_headers, get_page_params, paginate
+from core.querylimits import QueryLimits
 from profiles.serializers import ShortUserProfileSerializer
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -33,16 +35,19 @@ class SpotsAPIView(APIView):
         params = request.query_params
 
         business_id = params.get("businessId")
-        offset = cast_to_int(params.get("offset"))
-        up_offset = offset + 8
+        cursor, offset = get_page_params(params)
 
-        spots = Spot.objects.filter(business__uuid=business_id).order_by("-created_at")[
-            offset:up_offset
-        ]
+        page = paginate(
+            Spot.objects.filter(business__uuid=business_id),
+            ("-created_at", "-id"),
+            QueryLimits.BUSINESS_SPOT_LIMIT,
+            cursor=cursor,
+            offset=offset,
+        )
 
-        spots = SpotSerializer(spots, many=True, context={"user": request.user})
+        spots = SpotSerializer(page.items, many=True, context={"user": request.user})
 
-        return Response(spots.data, status=HTTP_200_OK)
+        return Response(spots.data, status=HTTP_200_OK, headers=get_page_headers(page))
 
     def delete(self, request):
         spotId = request.query_params.get("spotId")
@@ -64,7 +69,6 @@ def reply_spot(request):
 
     if spot is not None:
         spot.replies.add(profile)
-        spot.save()
 
         send_spot_reply_notification(profile, spot)
 
@@ -2,4 +2,14 @@
 
 docker-compose run --entrypoint="" app python backend/manage.py makemigrations
 
-docker-compose run --entrypoint="" app python backend/manage.py migrate
\ No newline at end of file
+docker-compose run --entrypoint="" app python backend/manage.py migrate
+
+docker-compose run --entrypoint="" app python backend/manage.py build_location_fields
+
+docker-compose run --entrypoint="" app python backend/manage.py reconcile_counters
+
+docker-compose run --entrypoint="" app python backend/manage.py backfill_insight_days
+
+docker-compose run --entrypoint="" app python backend/manage.py build_event_occurrences
+
+docker-compose run --entrypoint="" app python backend/manage.py build_inbox
\ No newline at end of file